@@ -0,0 +1,227 @@
+"""
+_apply_operations: precomputed fuzzy anchor index vs the original difflib scans.
+
+Checks that both produce byte-identical JSON on randomized resumes and op lists
+(near-miss anchors, rewrites against similar highlights, unmatched finds), then
+times op application on resumes with many work entries and long op lists.
+
+    cd backend && python benchmarks/bench_apply_ops.py --sizes 50 200 800 --ops 200
+"""
+import argparse, copy, json, os, random, re, sys, tempfile, time
+from difflib import get_close_matches
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+os.environ["RESUME_DB"] = os.path.join(tempfile.mkdtemp(), "bench.db")
+
+import main
+from main import _ensure_list, _append_unique, _add_skill_keywords_bucket
+
+
+def reference_rewrite(entry: dict, new_text: str, find_match=None, cap: int = 10):
+    highlights = _ensure_list(entry, "highlights")
+    if find_match:
+        # Fuzzy replace: find the closest existing highlight
+        target = None
+        if highlights:
+            close = get_close_matches(find_match, highlights, n=1, cutoff=0.55)
+            if close:
+                target = close[0]
+        if target:
+            idx = highlights.index(target)
+            highlights[idx] = new_text if re.search(r"[.!?]$", new_text) else new_text + "."
+            return
+    _append_unique(highlights, new_text, cap=cap)
+
+
+def reference_apply(baseline: dict, ops: list) -> dict:
+    """
+    The _apply_operations this replaced, kept verbatim as the correctness oracle.
+    """
+    tailored = copy.deepcopy(baseline)
+
+    def _anchor_entry(section: str, anchor: str) -> dict:
+        anchor = (anchor or "").strip()
+        if section == "work":
+            if not tailored.get("work"):
+                tailored["work"] = [{"name": anchor or "", "highlights": []}]
+            # find closest by name/company
+            pool = tailored["work"]
+            names = [(w.get("name") or w.get("company") or "") for w in pool]
+            if anchor and anchor in names:
+                return pool[names.index(anchor)]
+            if anchor and names:
+                close = get_close_matches(anchor, names, n=1, cutoff=0.6)
+                if close:
+                    return pool[names.index(close[0])]
+            # fallback: first
+            return pool[0]
+        else:
+            # projects
+            tailored.setdefault("projects", [])
+            pool = tailored["projects"]
+            if anchor:
+                tgt = next((p for p in pool if (p.get("name") or "") == anchor), None)
+                if tgt is None:
+                    tgt = {"name": anchor, "highlights": []}
+                    pool.append(tgt)
+                return tgt
+            # unnamed project
+            if not pool:
+                pool.append({"name":"Project A","highlights":[]})
+            return pool[0]
+
+    for op in ops:
+        try:
+            if op.get("op") == "add_highlight":
+                section = op["section"]
+                anchor = op.get("anchor") or ""
+                text = op["text"]
+                entry = _anchor_entry(section, anchor)
+                reference_rewrite(entry, text, find_match=None, cap=10 if section=="work" else 8)
+
+            elif op.get("op") == "rewrite_highlight":
+                section = op["section"]
+                anchor = op.get("anchor") or ""
+                text = op["text"]
+                find = op.get("find") or ""
+                entry = _anchor_entry(section, anchor)
+                reference_rewrite(entry, text, find_match=find, cap=10 if section=="work" else 8)
+
+            elif op.get("op") == "add_skill_keywords":
+                kws = [k.strip() for k in (op.get("keywords") or []) if isinstance(k, str) and k.strip()]
+                if kws:
+                    tailored.setdefault("skills", [])
+                    _add_skill_keywords_bucket(tailored["skills"], kws)
+
+            elif op.get("op") == "add_education_highlight":
+                anchor = (op.get("anchor") or "").strip()
+                tailored.setdefault("education", [])
+                edu = None
+                if anchor:
+                    edu = next((e for e in tailored["education"] if (e.get("institution") or "").strip() == anchor), None)
+                if edu is None:
+                    if not tailored["education"]:
+                        tailored["education"].append({"institution": anchor or ""})
+                    edu = tailored["education"][0]
+                hl = _ensure_list(edu, "highlights")
+                _append_unique(hl, op["text"], cap=6)
+
+            elif op.get("op") == "add_certificate":
+                name = (op.get("name") or "").strip()
+                if name:
+                    tailored.setdefault("certificates", [])
+                    summary = (op.get("summary") or "").strip()
+                    item = {"name": name}
+                    if summary:
+                        item["summary"] = summary
+                    # de-dupe by name
+                    names = {(c.get("name") or "").strip() for c in tailored["certificates"]}
+                    if name not in names:
+                        tailored["certificates"].append(item)
+
+            elif op.get("op") == "update_summary":
+                text = (op.get("text") or "").strip()
+                if text:
+                    tailored.setdefault("basics", {})
+                    base_summary = (tailored["basics"].get("summary") or "").strip()
+                    if text not in base_summary:
+                        new_sum = (base_summary + (" • " if base_summary else "") + text)
+                        tailored["basics"]["summary"] = new_sum[:1000]
+
+        except Exception:
+            # Skip malformed op; continue safely
+            continue
+
+    return tailored
+
+
+VERBS = ["Built", "Led", "Shipped", "Designed", "Migrated", "Automated", "Scaled", "Reduced"]
+THINGS = ["ETL pipelines", "a React dashboard", "the billing service", "CI/CD", "Kafka consumers",
+          "a SQL warehouse", "ML feature store", "on-call tooling", "the search API"]
+
+
+def _highlight(rng):
+    return f"{rng.choice(VERBS)} {rng.choice(THINGS)} for team {rng.randrange(40)} cutting cost {rng.randrange(5, 60)}%."
+
+
+def _mutate(s, rng):
+    """Near-miss of s: drop, swap or case-change a few characters."""
+    chars = list(s)
+    for _ in range(rng.randrange(0, 4)):
+        if not chars:
+            break
+        i = rng.randrange(len(chars))
+        kind = rng.randrange(3)
+        if kind == 0:
+            del chars[i]
+        elif kind == 1:
+            chars[i] = chars[i].swapcase()
+        else:
+            chars.insert(i, rng.choice("abcxyz "))
+    return "".join(chars)
+
+
+def make_case(n_work, n_ops, rng):
+    work = [{"name": f"Company {i} {rng.choice(['Labs', 'Inc', 'Systems', ''])}".strip(),
+             "highlights": [_highlight(rng) for _ in range(rng.randrange(0, 10))]}
+            for i in range(n_work)]
+    if n_work and rng.random() < 0.2:
+        work[0] = {"company": "Acme", "highlights": ["Built ETL pipelines."]}
+    baseline = {"basics": {"summary": "Engineer."}, "work": work,
+                "projects": [{"name": "Rivoney", "highlights": ["Built a React dashboard."]}],
+                "skills": ["Python"], "education": [{"institution": "State U"}]}
+    ops = []
+    for _ in range(n_ops):
+        src = rng.choice(work) if work else {"name": "", "highlights": []}
+        anchor = _mutate(src.get("name") or src.get("company") or "", rng) if rng.random() < 0.9 else "Unrelated Corp"
+        section = "work" if rng.random() < 0.85 else "projects"
+        if rng.random() < 0.6:
+            hls = src.get("highlights") or [_highlight(rng)]
+            find = _mutate(rng.choice(hls), rng) if rng.random() < 0.8 else _highlight(rng)
+            ops.append({"op": "rewrite_highlight", "section": section, "anchor": anchor,
+                        "find": find, "text": _highlight(rng)})
+        else:
+            ops.append({"op": "add_highlight", "section": section, "anchor": anchor, "text": _highlight(rng)})
+    ops.append({"op": "add_skill_keywords", "keywords": ["SQL", "Kafka"]})
+    return baseline, ops
+
+
+def check_equivalence(trials, rng):
+    for t in range(trials):
+        baseline, ops = make_case(rng.randrange(0, 30), rng.randrange(1, 60), rng)
+        want = json.dumps(reference_apply(baseline, ops))
+        got = json.dumps(main._apply_operations(baseline, ops))
+        if want != got:
+            raise SystemExit(f"mismatch on trial {t}")
+    print(f"equivalence: {trials} randomized trials byte-identical")
+
+
+def best_of(fn, baseline, ops, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(baseline, ops)
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def main_():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[50, 200, 800], help="work entries per resume")
+    ap.add_argument("--ops", type=int, default=200)
+    ap.add_argument("--trials", type=int, default=300)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+    rng = random.Random(11)
+
+    check_equivalence(args.trials, rng)
+    for n in args.sizes:
+        baseline, ops = make_case(n, args.ops, rng)
+        ref = best_of(reference_apply, baseline, ops, args.repeat)
+        new = best_of(main._apply_operations, baseline, ops, args.repeat)
+        print(f"work={n:5d} ops={len(ops):4d}  difflib {ref*1000:9.1f} ms   indexed {new*1000:8.1f} ms   {ref/new:5.1f}x")
+
+
+if __name__ == "__main__":
+    main_()
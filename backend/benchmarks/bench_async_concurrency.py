@@ -0,0 +1,123 @@
+"""
+How many /analyze/gaps requests can one worker keep in flight?
+
+Compares the previous sync handler (def endpoint + blocking OpenAI client, bounded
+by the AnyIO threadpool) with the current async handler (AsyncOpenAI). The model is
+replaced by a fake that just sleeps, so the numbers measure the server, not OpenAI.
+
+    cd backend && python benchmarks/bench_async_concurrency.py --requests 200 --latency 1.0
+"""
+import argparse, asyncio, contextlib, io, os, sys, tempfile, threading, time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+os.environ["RESUME_DB"] = os.path.join(tempfile.mkdtemp(), "bench.db")
+
+import httpx
+from fastapi import FastAPI
+import main
+
+CONTENT = '{"questions":[{"question":"Which SQL tools did you use?","jd_gap":"SQL","gap_reason":"no tools","coverage_status":"missing"}]}'
+RESUME = {"basics": {"name": "Bench"}, "work": [{"name": "Acme", "highlights": ["Built dashboards."]}]}
+
+
+class InFlight:
+    def __init__(self):
+        self.now = 0
+        self.peak = 0
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def enter(self):
+        with self._lock:
+            self.now += 1
+            self.calls += 1
+            self.peak = max(self.peak, self.now)
+
+    def leave(self):
+        with self._lock:
+            self.now -= 1
+
+
+def _completion():
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=CONTENT))], usage=None)
+
+
+def fake_sync_client(latency, gauge):
+    def create(**kwargs):
+        gauge.enter()
+        try:
+            time.sleep(latency)
+            return _completion()
+        finally:
+            gauge.leave()
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+
+def fake_async_client(latency, gauge):
+    async def create(**kwargs):
+        gauge.enter()
+        try:
+            await asyncio.sleep(latency)
+            return _completion()
+        finally:
+            gauge.leave()
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    client.with_options = lambda **_: client
+    return client
+
+
+def legacy_app(client):
+    # The handler as it was before: plain def, blocking client, runs in the threadpool
+    app = FastAPI()
+
+    @app.post("/analyze/gaps", response_model=main.AnalyzeGapsResponse)
+    def analyze_gaps(req: main.AnalyzeGapsRequest):
+        snippet = main._compact(req.resume)
+        system_msg, user_msg, schema = main._gap_prompt(snippet, req.job_description, 5)
+        resp = client.chat.completions.create(**main._gap_request(system_msg, user_msg, schema, True))
+        items = []
+        main._collect_gap_items(resp.choices[0].message.content or "{}", items, set())
+        return main.AnalyzeGapsResponse(questions=items[:5])
+
+    return app
+
+
+async def drive(app, n, label):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as http:
+        # A distinct JD per request (and per run), so the gap cache and single-flight can't
+        # fold them into one model call: every request here is a real call on both sides
+        bodies = [{"job_description": f"Looking for SQL and Python ({label} req {i}).", "resume": RESUME} for i in range(n)]
+        t0 = time.perf_counter()
+        resps = await asyncio.gather(*[http.post("/analyze/gaps", json=body) for body in bodies])
+        elapsed = time.perf_counter() - t0
+    ok = sum(1 for r in resps if r.status_code == 200)
+    return ok, elapsed
+
+
+def run(label, app, n, gauge):
+    # /analyze/gaps prints per request; keep the report readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        ok, elapsed = asyncio.run(drive(app, n, label))
+    print(f"{label:<6} ok={ok}/{n}  model_calls={gauge.calls:<4}  peak_in_flight={gauge.peak:<4}  wall={elapsed:6.2f}s  throughput={ok / elapsed:7.1f} req/s")
+
+
+def main_():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--requests", type=int, default=200)
+    ap.add_argument("--latency", type=float, default=1.0, help="fake model latency in seconds")
+    args = ap.parse_args()
+
+    sync_gauge, async_gauge = InFlight(), InFlight()
+    sync_client = fake_sync_client(args.latency, sync_gauge)
+    main.aclient = fake_async_client(args.latency, async_gauge)
+
+    print(f"{args.requests} concurrent /analyze/gaps requests, fake model latency {args.latency}s")
+    run("sync", legacy_app(sync_client), args.requests, sync_gauge)
+    run("async", main.app, args.requests, async_gauge)
+
+
+if __name__ == "__main__":
+    main_()
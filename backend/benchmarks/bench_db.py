@@ -0,0 +1,68 @@
+"""
+Save/load throughput of the storage helpers, before and after connection pooling.
+
+"before" swaps get_conn back to a fresh sqlite3.connect() per call on a rollback-
+journal database (the old behaviour); "pooled" uses the pooled WAL connections;
+"cached" adds the in-process latest-resume cache on top.
+
+    cd backend && python benchmarks/bench_db.py --ops 2000
+"""
+import argparse, os, sqlite3, sys, tempfile, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+os.environ["RESUME_DB"] = os.path.join(tempfile.mkdtemp(), "bench.db")
+
+import main
+
+POOLED_GET_CONN = main.get_conn
+
+
+def sample_resume(i):
+    return {
+        "basics": {"name": "Bench User", "summary": "Data engineer " * 10},
+        "work": [
+            {"name": f"Company {w}", "position": "Engineer", "highlights": [f"Shipped thing {w}.{h} for {i} users." for h in range(6)]}
+            for w in range(5)
+        ],
+        "skills": ["Python", "SQL", {"name": "Core Skills", "keywords": ["AWS", "ETL", "Tableau"]}],
+    }
+
+
+def run(label, db_path, ops, users):
+    main.DB_PATH = db_path
+    main.init_db()
+    t0 = time.perf_counter()
+    for i in range(ops):
+        main.save_resume(main.SaveResumeRequest(user_id=f"u{i % users}", resume=sample_resume(i)))
+    save_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for i in range(ops):
+        main.load_latest_resume_view(f"u{i % users}")
+    load_s = time.perf_counter() - t0
+    print(f"{label:<7} save: {ops / save_s:8.0f} ops/s ({save_s * 1e6 / ops:7.1f} us/op)   "
+          f"load: {ops / load_s:8.0f} ops/s ({load_s * 1e6 / ops:7.1f} us/op)")
+
+
+def main_():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--ops", type=int, default=2000)
+    ap.add_argument("--users", type=int, default=20)
+    args = ap.parse_args()
+    tmp = tempfile.mkdtemp()
+
+    cache_size = main._RESUME_CACHE.max_users
+    main._RESUME_CACHE.max_users = 0
+    main.get_conn = lambda: sqlite3.connect(main.DB_PATH)
+    run("before", os.path.join(tmp, "before.db"), args.ops, args.users)
+
+    main.get_conn = POOLED_GET_CONN
+    run("pooled", os.path.join(tmp, "pooled.db"), args.ops, args.users)
+
+    main._RESUME_CACHE.max_users = cache_size
+    run("cached", os.path.join(tmp, "cached.db"), args.ops, args.users)
+
+
+if __name__ == "__main__":
+    main_()
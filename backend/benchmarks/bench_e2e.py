@@ -0,0 +1,197 @@
+"""
+End-to-end latency/throughput of the backend against a local fake OpenAI.
+
+Starts benchmarks/fake_openai.py and the real app (both under uvicorn, in-process
+threads, real HTTP), then drives /resume/save, /resume/latest, /template/options,
+/analyze/gaps and /generate at each requested concurrency. Gap and generate
+requests vary their JD/answers so they miss the caches and reach the fake model
+(unless --cache-hits). Reports p50/p95/p99, mean and throughput per endpoint and
+writes everything to JSON; --compare prints the change against an earlier run.
+
+    cd backend && python benchmarks/bench_e2e.py --requests 200 --concurrency 1 16 64 --latency 0.2
+    cd backend && python benchmarks/bench_e2e.py --rate-429 0.05 --schema-400 0.5 --compare results/e2e-abc123.json
+"""
+import argparse, asyncio, contextlib, io, json, os, platform, socket, subprocess, sys, tempfile, threading, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+ENDPOINTS = ["save", "latest", "options", "gaps", "generate"]
+JD = "Data engineer: SQL, Python, Kafka and AWS required. Terraform is a plus."
+RESUME = {
+    "basics": {"name": "Bench", "summary": "Data engineer."},
+    "work": [{"name": "Acme", "position": "Engineer",
+              "highlights": [f"Built pipeline {i} in Python moving {i * 10}k rows/day." for i in range(6)]},
+             {"name": "Globex", "position": "Analyst", "highlights": ["Owned Tableau reporting."]}],
+    "projects": [{"name": "Rivoney", "highlights": ["Resume tailoring app."]}],
+    "education": [{"institution": "State U", "area": "CS"}],
+    "skills": ["Python", "SQL", {"name": "Cloud", "keywords": ["AWS", "Docker"]}],
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _serve(app, port: int):
+    import uvicorn
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", access_log=False))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.02)
+    return server
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).strip()
+    except Exception:
+        return "unknown"
+
+
+def percentile(sorted_vals, p: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_vals:
+        return 0.0
+    k = max(0, min(len(sorted_vals) - 1, int(round(p / 100.0 * len(sorted_vals) + 0.5)) - 1))
+    return sorted_vals[k]
+
+
+def make_request(endpoint: str, i: int, users: int, cache_hits: bool, run: str = ""):
+    """(method, path, kwargs) for request i of a scenario; `run` keeps inputs unique across scenarios."""
+    user = f"bench-{i % users}"
+    tag = "" if cache_hits else f" ({run}req {i})"
+    if endpoint == "save":
+        resume = dict(RESUME, basics={"name": "Bench", "summary": f"Data engineer{tag}."})
+        return "POST", "/resume/save", {"json": {"user_id": user, "resume": resume}}
+    if endpoint == "latest":
+        return "GET", "/resume/latest", {"params": {"user_id": user}}
+    if endpoint == "options":
+        return "GET", "/template/options", {"params": {"user_id": user}}
+    if endpoint == "gaps":
+        return "POST", "/analyze/gaps", {"json": {"user_id": user, "job_description": JD + tag}}
+    answers = {"0": [{"text": f"Built Kafka consumers for SQL dashboards{tag}", "experience": "Acme"}]}
+    questions = [{"question": "What did your Kafka consumers process?", "jd_gap": "Kafka"}]
+    return "POST", "/generate", {"json": {"user_id": user, "job_description": JD, "questions": questions, "answers": answers}}
+
+
+async def run_scenario(base_url: str, endpoint: str, n: int, concurrency: int, users: int, cache_hits: bool) -> dict:
+    import httpx
+    latencies, statuses = [], {}
+    sem = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as http:
+        async def one(i):
+            method, path, kw = make_request(endpoint, i, users, cache_hits, run=f"c{concurrency} ")
+            async with sem:
+                t0 = time.perf_counter()
+                try:
+                    r = await http.request(method, path, **kw)
+                    status = str(r.status_code)
+                except httpx.HTTPError as e:
+                    status = type(e).__name__
+                latencies.append(time.perf_counter() - t0)
+                statuses[status] = statuses.get(status, 0) + 1
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*[one(i) for i in range(n)])
+        wall = time.perf_counter() - t0
+
+    lat = sorted(x * 1000 for x in latencies)
+    return {
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "requests": n,
+        "errors": sum(c for s, c in statuses.items() if not s.startswith("2")),
+        "status_counts": statuses,
+        "p50_ms": round(percentile(lat, 50), 2),
+        "p95_ms": round(percentile(lat, 95), 2),
+        "p99_ms": round(percentile(lat, 99), 2),
+        "mean_ms": round(sum(lat) / len(lat), 2) if lat else 0.0,
+        "throughput_rps": round(n / wall, 1) if wall else 0.0,
+        "wall_s": round(wall, 3),
+    }
+
+
+def compare(results: list, old_path: str) -> None:
+    with open(old_path, encoding="utf-8") as f:
+        old = {(r["endpoint"], r["concurrency"]): r for r in json.load(f)["results"]}
+    print(f"\nvs {old_path}:")
+    for r in results:
+        o = old.get((r["endpoint"], r["concurrency"]))
+        if not o:
+            continue
+        d = lambda k: (r[k] - o[k]) / o[k] * 100 if o[k] else 0.0
+        print(f"  {r['endpoint']:9s} c={r['concurrency']:<4d} p50 {d('p50_ms'):+6.1f}%  p95 {d('p95_ms'):+6.1f}%  "
+              f"p99 {d('p99_ms'):+6.1f}%  rps {d('throughput_rps'):+6.1f}%")
+
+
+def main_():
+    from fake_openai import add_fake_args, config_from_args, make_app
+
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--requests", type=int, default=200, help="requests per endpoint per concurrency level")
+    ap.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    ap.add_argument("--endpoints", nargs="+", default=ENDPOINTS, choices=ENDPOINTS)
+    ap.add_argument("--users", type=int, default=20, help="distinct user_ids the requests spread over")
+    ap.add_argument("--cache-hits", action="store_true", help="repeat identical gap/generate inputs")
+    ap.add_argument("--out", help="results file (default: benchmarks/results/e2e-<commit>-<time>.json)")
+    ap.add_argument("--compare", help="earlier results file to diff against")
+    add_fake_args(ap)
+    args = ap.parse_args()
+
+    fake_cfg = config_from_args(args)
+    fake_port, app_port = _free_port(), _free_port()
+    fake = make_app(fake_cfg)
+    _serve(fake, fake_port)
+
+    # main reads these at import time
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{fake_port}/v1"
+    os.environ["OPENAI_API_KEY"] = "bench"
+    os.environ["RESUME_DB"] = os.path.join(tempfile.mkdtemp(), "bench.db")
+    import main
+    _serve(main.app, app_port)
+    base_url = f"http://127.0.0.1:{app_port}"
+
+    # Every user needs a saved resume before the read endpoints mean anything
+    with contextlib.redirect_stdout(io.StringIO()):
+        asyncio.run(run_scenario(base_url, "save", args.users, 8, args.users, True))
+
+    results = []
+    for concurrency in args.concurrency:
+        for endpoint in args.endpoints:
+            with contextlib.redirect_stdout(io.StringIO()):  # the app prints per gap request
+                r = asyncio.run(run_scenario(base_url, endpoint, args.requests, concurrency, args.users, args.cache_hits))
+            results.append(r)
+            print(f"{endpoint:9s} c={concurrency:<4d} p50 {r['p50_ms']:8.1f} ms  p95 {r['p95_ms']:8.1f} ms  "
+                  f"p99 {r['p99_ms']:8.1f} ms  {r['throughput_rps']:8.1f} req/s  errors {r['errors']}")
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "requests": args.requests,
+            "users": args.users,
+            "cache_hits": args.cache_hits,
+            "fake_openai": fake_cfg.as_dict(),
+            "fake_openai_counts": dict(fake.state.stats.counts),
+        },
+        "results": results,
+    }
+    out = args.out or os.path.join(os.path.dirname(os.path.abspath(__file__)), "results",
+                                   f"e2e-{report['meta']['commit']}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nwrote {out}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main_()
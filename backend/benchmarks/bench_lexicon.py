@@ -0,0 +1,139 @@
+"""
+SkillLexicon (Aho-Corasick) vs the single regex alternation it replaced.
+
+Grows the built-in lexicon with synthetic tool names and aliases up to each target
+size, checks both matchers return identical (start, end, canonical) matches on
+randomized answers, then reports compile time and time per answer. The regex tries
+every alias at every position, so it slows down as the lexicon grows; the automaton
+makes one pass per answer.
+
+Before timing, routes a fixed answer set through local_apply_ops and the regex router
+it replaced (_fallback_ops) and stops if any highlight-vs-skills decision differs.
+
+    cd backend && python benchmarks/bench_lexicon.py --terms 200 2000 8000 --answers 2000
+"""
+import argparse, os, random, re, sys, tempfile, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+os.environ["RESUME_DB"] = os.path.join(tempfile.mkdtemp(), "bench.db")
+
+import main
+
+SYLLABLES = "ka lo mi ser vo tra nex dal qui zen ar po ly fi gra hub sta tek".split()
+FILLER = ("built led the a for with across teams users latency pipelines dashboards reporting "
+          "migrated reduced by and on in of 40% 3x data platform").split()
+
+
+def reference_compile(terms):
+    """The regex compiler this replaced, kept verbatim as the correctness oracle."""
+    canon = {}
+    for name, aliases in terms.items():
+        for a in (name,) + aliases:
+            canon.setdefault(a.lower(), name)
+    alts = sorted(canon, key=len, reverse=True)
+    pattern = re.compile(r"(?<![\w+#./-])(" + "|".join(re.escape(a) for a in alts) + r")(?![\w+#]|\.\w)", re.I)
+    return pattern, canon
+
+
+def reference_scan(compiled, text):
+    pattern, canon = compiled
+    return [(m.start(), m.end(), canon[m.group(1).lower()]) for m in pattern.finditer(text)]
+
+
+def reference_route(txt):
+    """_fallback_ops' highlight test, kept verbatim as the routing oracle."""
+    is_bullety = bool(re.match(r"^(Built|Led|Designed|Developed|Automated|Deployed|Implemented|Created|Optimized|Migrated|Analyzed|Engineered)\b", txt, re.I))
+    has_signal = bool(re.search(r"\b(\d+%|\d+/\d+|SQL|Python|AWS|S3|ETL|LIMS|pipeline|dashboard|indexing|PowerShell|SSMS|Server|Tableau|model|accuracy)\b", txt, re.I))
+    return "highlight" if is_bullety and has_signal and len(txt) >= 50 else "skills"
+
+
+# Answers inside the old router's vocabulary, so both sides should agree on every one
+ROUTING_ANSWERS = [
+    "Led a team of 5 engineers to build a Python ETL pipeline processing 2M rows daily",
+    "Led a team migrating the SQL Server warehouse to Snowflake, cutting nightly load time by 30%",
+    "Built Tableau dashboards for the sales org used by 40 account managers",
+    "Designed the LIMS sample-tracking workflow and automated its SQL reports",
+    "Optimized slow queries with indexing, cutting report runtime from 20 min to 3",
+    "Migrated 300 PowerShell scripts to Python on AWS Lambda over two quarters",
+    "Developed a churn model with 87% accuracy on held-out customers",
+    "Engineered an S3 ingestion layer feeding the ETL jobs for three product lines",
+    "Python, SQL, Tableau",
+    "I know AWS and some PowerShell",
+    "Led sprint planning",
+    "Built it",
+    "Worked on data pipelines at Acme for a couple of years, mostly ETL",
+    "Analyzed customer feedback for the product team every week during launch",
+]
+
+
+def check_routing():
+    for txt in ROUTING_ANSWERS:
+        ops = main.local_apply_ops([{"rows": [{"text": txt, "experience": "Acme"}]}])
+        got = "highlight" if any(op["op"] == "add_highlight" for op in ops) else "skills"
+        want = reference_route(txt)
+        if got != want:
+            raise SystemExit(f"routing differs from the old router ({want} -> {got}): {txt!r}")
+    print(f"routing: {len(ROUTING_ANSWERS)} answers, same decisions as the old router")
+
+
+def grow(n_terms, rng):
+    terms = dict(main._BUILTIN_SKILL_TERMS)
+    while len(terms) < n_terms:
+        name = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+        if name in terms:
+            continue
+        aliases = [name.lower() + suffix for suffix in rng.sample(["db", "js", ".io", " cloud", "-ml", " studio"], 2)]
+        terms[name] = tuple(aliases)
+    return terms
+
+
+def answers(terms, n, rng):
+    aliases = [a for name, al in terms.items() for a in (name,) + al]
+    out = []
+    for _ in range(n):
+        words = []
+        for _ in range(rng.randint(12, 40)):
+            words.append(rng.choice(aliases) if rng.random() < 0.15 else rng.choice(FILLER))
+        sep = rng.choice([" ", ", ", " / "])
+        out.append(sep.join(words).capitalize() + ".")
+    return out
+
+
+def timed(fn, texts):
+    t0 = time.perf_counter()
+    for t in texts:
+        fn(t)
+    return (time.perf_counter() - t0) / len(texts)
+
+
+def main_():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--terms", type=int, nargs="+", default=[200, 2000, 8000], help="canonical terms in the lexicon")
+    ap.add_argument("--answers", type=int, default=2000)
+    args = ap.parse_args()
+    rng = random.Random(3)
+    check_routing()
+
+    for n in args.terms:
+        terms = grow(n, rng)
+        t0 = time.perf_counter()
+        ref = reference_compile(terms)
+        ref_build = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        lex = main.SkillLexicon(terms)
+        lex_build = time.perf_counter() - t0
+
+        texts = answers(terms, args.answers, rng)
+        for t in texts:
+            if reference_scan(ref, t) != [m[:3] for m in lex.scan(t)]:
+                raise SystemExit(f"mismatch at {n} terms: {t!r}")
+        ref_t = timed(lambda t: reference_scan(ref, t), texts)
+        lex_t = timed(lex.scan, texts)
+        print(f"terms={n:5d} aliases={len(lex):6d}  build regex {ref_build * 1000:7.1f} ms  automaton {lex_build * 1000:7.1f} ms   "
+              f"per answer regex {ref_t * 1e6:8.1f} us  automaton {lex_t * 1e6:7.1f} us  {ref_t / lex_t:5.1f}x  "
+              f"({len(texts)} answers identical)")
+
+
+if __name__ == "__main__":
+    main_()
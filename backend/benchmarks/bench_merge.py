@@ -0,0 +1,183 @@
+"""
+merge_resumes: indexed rewrite vs the original scan-based version.
+
+Checks that both produce byte-identical JSON on randomized inputs (duplicate
+names, repeated highlights, skill buckets, unnamed entries), then times them on
+resumes with hundreds of work entries, projects, highlights and skills.
+
+    cd backend && python benchmarks/bench_merge.py --sizes 100 300 1000
+"""
+import argparse, copy, json, os, random, sys, tempfile, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+os.environ["RESUME_DB"] = os.path.join(tempfile.mkdtemp(), "bench.db")
+
+import main
+from main import _normalize_skill_item, _add_skill_keywords_bucket, _dedupe_keep_order
+
+
+def reference_merge(base: dict, generated: dict) -> dict:
+    """
+    The merge_resumes this replaced, kept verbatim as the correctness oracle.
+    """
+    merged = copy.deepcopy(base)
+
+    # Basics.summary: enrich without overwriting
+    gen_summary = (generated.get("basics") or {}).get("summary", "").strip()
+    if gen_summary:
+        merged.setdefault("basics", {})
+        base_summary = (merged["basics"].get("summary") or "").strip()
+        if gen_summary and gen_summary not in base_summary:
+            merged["basics"]["summary"] = (base_summary + (" • " if base_summary else "") + gen_summary)[:1000]
+
+    # Work: append non-duplicate highlights (match by name/company)
+    merged.setdefault("work", [])
+    for gen_w in (generated.get("work") or []):
+        gen_name = gen_w.get("name") or gen_w.get("company")
+        gen_hls = list(gen_w.get("highlights") or [])
+        if not gen_hls:
+            continue
+
+        if gen_name:
+            target = next((w for w in merged["work"] if (w.get("name") or w.get("company")) == gen_name), None)
+            if target is None:
+                target = {"name": gen_name, "highlights": []}
+                merged["work"].append(target)
+        else:
+            if not merged["work"]:
+                merged["work"].append({"name": "", "highlights": []})
+            target = merged["work"][0]
+
+        target.setdefault("highlights", [])
+        for h in gen_hls:
+            h = (h or "").strip()
+            if h and h not in target["highlights"]:
+                target["highlights"].append(h)
+
+    # Projects: merge by name; append highlights or add project
+    merged.setdefault("projects", [])
+    for gen_p in (generated.get("projects") or []):
+        pname = gen_p.get("name") or ""
+        if not pname:
+            # unnamed project: append as-is if unique by highlight set
+            if gen_p.get("highlights"):
+                merged["projects"].append(gen_p)
+            continue
+        tgt = next((p for p in merged["projects"] if p.get("name") == pname), None)
+        if tgt is None:
+            merged["projects"].append(gen_p)
+        else:
+            tgt.setdefault("highlights", [])
+            for h in (gen_p.get("highlights") or []):
+                if h not in tgt["highlights"]:
+                    tgt["highlights"].append(h)
+
+    # Skills: flatten into strings and keywords bucket only (no levels)
+    merged.setdefault("skills", [])
+    # Normalize existing skills
+    flat_existing = []
+    buckets = []
+    for s in merged["skills"]:
+        if isinstance(s, dict) and "keywords" in s:
+            buckets.append(s)
+        else:
+            nm = _normalize_skill_item(s)
+            if nm:
+                flat_existing.append(nm)
+
+    # Add generated
+    for gs in (generated.get("skills") or []):
+        if isinstance(gs, dict) and "keywords" in gs:
+            _add_skill_keywords_bucket(merged["skills"], gs.get("keywords") or [])
+        elif isinstance(gs, dict) and gs.get("name"):
+            nm = (gs.get("name") or "").strip()
+            if nm and nm not in flat_existing:
+                merged["skills"].append(nm)
+                flat_existing.append(nm)
+        elif isinstance(gs, str):
+            nm = gs.strip()
+            if nm and nm not in flat_existing:
+                merged["skills"].append(nm)
+                flat_existing.append(nm)
+
+    # Dedupe flat skills, preserve buckets
+    new_flat = [x for x in merged["skills"] if not (isinstance(x, dict) and "keywords" in x)]
+    new_buckets = [x for x in merged["skills"] if isinstance(x, dict) and "keywords" in x]
+    merged["skills"] = _dedupe_keep_order(new_flat) + new_buckets
+
+    # Certificates
+    merged.setdefault("certificates", [])
+    existing_certs = {(c.get("name") or "").strip() for c in merged["certificates"] if isinstance(c, dict)}
+    for cert in (generated.get("certificates") or []):
+        nm = (cert.get("name") or "").strip()
+        if nm and nm not in existing_certs:
+            merged["certificates"].append(cert)
+            existing_certs.add(nm)
+
+    return merged
+
+
+def make_pair(n, rng):
+    """Base resume and generated overlay with ~n entries per section and heavy name overlap."""
+    names = [f"Company {i}" for i in range(n)]
+    hl = lambda: f"Delivered outcome {rng.randrange(n * 4)} with SQL."
+    base = {
+        "basics": {"name": "Bench", "summary": "Engineer."},
+        "work": [{"name": nm, "highlights": [hl() for _ in range(rng.randint(0, 8))]} for nm in names],
+        "projects": [{"name": f"Project {i}", "highlights": [hl() for _ in range(3)]} for i in range(n // 2)],
+        "skills": [f"Skill {i}" for i in range(n)] + [{"name": "Core Skills", "keywords": [f"kw{i}" for i in range(n)]}],
+        "certificates": [{"name": f"Cert {i}"} for i in range(n // 4)],
+    }
+    gen = {
+        "basics": {"summary": "Tailored summary."},
+        "work": [{"name": rng.choice(names + ["New Co", ""]), "highlights": [hl() for _ in range(rng.randint(0, 6))]}
+                 for _ in range(n)],
+        "projects": [{"name": rng.choice([f"Project {rng.randrange(n)}", ""]), "highlights": [hl() for _ in range(2)]}
+                     for _ in range(n // 2)],
+        "skills": [rng.choice([f"Skill {rng.randrange(2 * n)}", {"name": f"Skill {rng.randrange(2 * n)}"},
+                               {"keywords": [f"kw{rng.randrange(2 * n)}" for _ in range(5)]}]) for _ in range(n)],
+        "certificates": [{"name": f"Cert {rng.randrange(n)}"} for _ in range(n // 4)],
+    }
+    return base, gen
+
+
+def check_equivalence(trials, rng):
+    for t in range(trials):
+        base, gen = make_pair(rng.randint(0, 30), rng)
+        if rng.random() < 0.2:
+            base["skills"] = [s for s in base["skills"] if isinstance(s, str)]
+        want = json.dumps(reference_merge(copy.deepcopy(base), copy.deepcopy(gen)))
+        got = json.dumps(main.merge_resumes(copy.deepcopy(base), copy.deepcopy(gen)))
+        assert got == want, f"output mismatch on trial {t}"
+    print(f"equivalence: {trials} randomized trials byte-identical")
+
+
+def best_of(fn, base, gen, repeat):
+    times = []
+    for _ in range(repeat):
+        b, g = copy.deepcopy(base), copy.deepcopy(gen)
+        t0 = time.perf_counter()
+        fn(b, g)
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def main_():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[100, 300, 1000])
+    ap.add_argument("--trials", type=int, default=300)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+    rng = random.Random(11)
+
+    check_equivalence(args.trials, rng)
+    for n in args.sizes:
+        base, gen = make_pair(n, rng)
+        old = best_of(reference_merge, base, gen, args.repeat)
+        new = best_of(main.merge_resumes, base, gen, args.repeat)
+        print(f"n={n:<5} original={old * 1e3:9.2f} ms  indexed={new * 1e3:8.2f} ms  speedup={old / new:6.1f}x")
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,158 @@
+"""
+Per-request CPU spent on JSON: the stdlib path this replaced vs the serializer layer.
+
+For each resume size, times the JSON work of one request on each hot path with
+time.process_time (CPU, not wall clock) and checks both sides produce the same
+document:
+
+  save          encode the resume for the resumes row
+  latest/miss   parse the stored row, then render {"resume": ...} for the client
+  latest/hit    render {"resume": ...} from the cached view (pre-encoded bytes now)
+  apply         encode the /generate model payload (projected resume + Q&A)
+  stored ops    encode + parse an operation list for apply_ops
+
+    cd backend && python benchmarks/bench_serialization.py --work 20 100 400 --requests 200
+    JSON_BACKEND=stdlib python benchmarks/bench_serialization.py   # the fallback codec
+"""
+import argparse, json, os, random, sys, tempfile, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+os.environ["RESUME_DB"] = os.path.join(tempfile.mkdtemp(), "bench.db")
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+import main
+
+WORDS = ("built led designed automated migrated optimized pipelines dashboards SQL Python AWS ETL "
+         "reporting latency cost users teams Zürich café naïve résumé 数据").split()
+
+
+def sentence(rng):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(10, 22))).capitalize() + "."
+
+
+def make_resume(n_work, rng):
+    return {
+        "basics": {"name": "Bench Ünicode", "email": "bench@example.com", "summary": sentence(rng),
+                   "location": {"city": "Zürich", "countryCode": "CH"}},
+        "work": [{"name": f"Company {w}", "position": "Engineer", "startDate": "2019-01", "endDate": "2021-06",
+                  "highlights": [sentence(rng) for _ in range(8)]} for w in range(n_work)],
+        "projects": [{"name": f"Project {p}", "highlights": [sentence(rng) for _ in range(4)]}
+                     for p in range(max(1, n_work // 4))],
+        "skills": ["Python", "SQL", {"name": "Core Skills", "keywords": [rng.choice(WORDS) for _ in range(30)]}],
+        "education": [{"institution": "State University", "studyType": "BS", "score": 3.7}],
+    }
+
+
+def make_ops(n, rng):
+    return [{"op": "add_highlight", "section": "work", "anchor": f"Company {i}", "text": sentence(rng)}
+            for i in range(n)]
+
+
+# ---- the pre-serializer code paths, kept verbatim as the baseline ----
+def reference_save(resume):
+    return json.dumps(resume)
+
+
+def reference_latest_miss(row_text):
+    view = main._freeze(json.loads(row_text))
+    return JSONResponse({"resume": view}).body  # jsonable_encoder walk + json.dumps in render
+
+
+def reference_latest_hit(view):
+    return JSONResponse(jsonable_encoder({"resume": view})).body
+
+
+def reference_apply(payload):
+    return json.dumps(payload, ensure_ascii=False)
+
+
+def reference_ops(ops):
+    return json.loads(json.dumps(ops, ensure_ascii=False))
+
+
+# ---- the same requests through main's serializer layer ----
+def new_save(resume):
+    return main.json_dumpb(resume).decode("utf-8")
+
+
+def new_latest_miss(row_text):
+    main._freeze(main.json_loads(row_text))
+    return b'{"resume":' + row_text.encode("utf-8") + b"}"  # the stored text is the body
+
+
+def new_latest_hit(encoded):
+    return b'{"resume":' + encoded + b"}"
+
+
+def new_apply(payload):
+    return main.json_dumps(payload)
+
+
+def new_ops(ops):
+    return main.json_loads(main.json_dumps(ops))
+
+
+def cpu(fn, arg, n, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.process_time()
+        for _ in range(n):
+            fn(arg)
+        best = min(best, time.process_time() - t0)
+    return best / n
+
+
+def check(name, want, got):
+    if isinstance(want, (bytes, str)):
+        want = json.loads(want)
+    if isinstance(got, (bytes, str)):
+        got = json.loads(got)
+    if want != got:
+        raise SystemExit(f"mismatch: {name}")
+
+
+def main_():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--work", type=int, nargs="+", default=[20, 100, 400], help="work entries per resume")
+    ap.add_argument("--requests", type=int, default=200, help="requests timed per path and size")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+    rng = random.Random(5)
+    print(f"codec: {main.JSON_CODEC}")
+
+    for n_work in args.work:
+        resume = make_resume(n_work, rng)
+        row_text = new_save(resume)
+        view = main._freeze(resume)
+        encoded = row_text.encode("utf-8")
+        projected, _, _ = main.project_resume(resume, "Need SQL, Python and AWS pipelines", 0)
+        payload = {"job_description": "Need SQL, Python and AWS pipelines" * 20, "baseline_resume": projected,
+                   "qa": [{"question": sentence(rng), "answers": [sentence(rng)]} for _ in range(8)]}
+        ops = make_ops(max(10, n_work), rng)
+
+        paths = [
+            ("save", reference_save, new_save, resume, resume),
+            ("latest/miss", reference_latest_miss, new_latest_miss, row_text, row_text),
+            ("latest/hit", reference_latest_hit, new_latest_hit, view, encoded),
+            ("apply", reference_apply, new_apply, payload, payload),
+            ("stored ops", reference_ops, new_ops, ops, ops),
+        ]
+        print(f"\nwork={n_work}  resume={len(encoded) / 1024:.0f} KiB")
+        total_ref = total_new = 0.0
+        for name, ref_fn, new_fn, ref_arg, new_arg in paths:
+            check(name, ref_fn(ref_arg), new_fn(new_arg))
+            ref = cpu(ref_fn, ref_arg, args.requests, args.repeat)
+            new = cpu(new_fn, new_arg, args.requests, args.repeat)
+            total_ref += ref
+            total_new += new
+            print(f"  {name:<12} stdlib {ref * 1e6:9.1f} us   {main.JSON_CODEC:<7}{new * 1e6:9.1f} us   "
+                  f"saved {(ref - new) * 1e6:9.1f} us/request  {ref / max(new, 1e-9):6.1f}x")
+        print(f"  {'all paths':<12} stdlib {total_ref * 1e6:9.1f} us   {main.JSON_CODEC:<7}{total_new * 1e6:9.1f} us   "
+              f"saved {(total_ref - total_new) * 1e6:9.1f} us/request")
+
+
+if __name__ == "__main__":
+    main_()
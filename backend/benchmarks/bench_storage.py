@@ -0,0 +1,117 @@
+"""
+Storage size and read amplification of RESUME_STORAGE=full vs delta.
+
+Saves a synthetic 1,000-version history (small edits per save, like the builder
+produces) under each mode, checks every version reconstructs exactly, and reports
+bytes stored, rows read per load and load latency. First checks that a save diffed
+against the cached (frozen) view stays minimal: one prepended work entry is one add.
+
+    cd backend && python benchmarks/bench_storage.py --versions 1000 --snapshot-every 20
+"""
+import argparse, copy, json, os, random, sys, tempfile, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+os.environ["RESUME_DB"] = os.path.join(tempfile.mkdtemp(), "bench.db")
+
+import main
+
+WORDS = "built led designed automated migrated optimized pipelines dashboards SQL Python AWS ETL reporting latency cost users teams".split()
+
+
+def sentence(rng):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 16))).capitalize() + "."
+
+
+def history(n, seed=7):
+    rng = random.Random(seed)
+    doc = {
+        "basics": {"name": "Bench User", "email": "bench@example.com", "summary": sentence(rng)},
+        "work": [{"name": f"Company {w}", "position": "Engineer", "startDate": "2019-01",
+                  "highlights": [sentence(rng) for _ in range(6)]} for w in range(6)],
+        "projects": [{"name": f"Project {p}", "highlights": [sentence(rng) for _ in range(3)]} for p in range(4)],
+        "skills": ["Python", "SQL", {"name": "Core Skills", "keywords": ["AWS", "ETL"]}],
+        "education": [{"institution": "State University", "studyType": "BS"}],
+    }
+    out = []
+    for _ in range(n):
+        doc = copy.deepcopy(doc)
+        w = rng.choice(doc["work"])
+        r = rng.random()
+        if r < 0.4:
+            w["highlights"].append(sentence(rng))
+        elif r < 0.7 and w["highlights"]:
+            w["highlights"][rng.randrange(len(w["highlights"]))] = sentence(rng)
+        elif r < 0.8 and w["highlights"]:
+            w["highlights"].pop(rng.randrange(len(w["highlights"])))
+        elif r < 0.9:
+            doc["skills"][-1]["keywords"].append(rng.choice(WORDS) + str(rng.randint(0, 99)))
+        else:
+            doc["basics"]["summary"] = sentence(rng)
+        out.append(doc)
+    return out
+
+
+def check_frozen_diff(doc):
+    """Saves diff against _RESUME_CACHE's frozen view; it must diff like the plain document."""
+    new = copy.deepcopy(doc)
+    new["work"].insert(0, {"name": "New Co", "position": "Engineer", "highlights": ["Started."]})
+    ops = main.json_diff(main._freeze(doc), new)
+    if [op["op"] for op in ops] != ["add"] or ops != main.json_diff(doc, new):
+        raise SystemExit(f"prepending one work entry to the cached view gave {len(ops)} ops: {ops!r:.200}")
+    print(f"frozen-view diff: one prepended work entry -> {len(json.dumps(ops))} byte patch, 1 add op")
+
+
+def run(mode, docs, snapshot_every, db_path):
+    main.DB_PATH = db_path
+    main.RESUME_STORAGE = mode
+    main.RESUME_SNAPSHOT_EVERY = snapshot_every
+    main.init_db()
+
+    t0 = time.perf_counter()
+    for d in docs:
+        main.insert_resume_version("bench", d, "t")
+    save_s = time.perf_counter() - t0
+
+    con = main.get_conn()
+    stored = con.execute("SELECT SUM(length(json_resume)) FROM resumes").fetchone()[0]
+    encodings = [r[0] for r in con.execute("SELECT encoding FROM resumes WHERE user_id = 'bench' ORDER BY version")]
+    # rows touched per load: the row itself, plus snapshot + intermediate deltas for a delta row
+    reads, since_snap = [], 0
+    for enc in encodings:
+        since_snap = 0 if enc == "full" else since_snap + 1
+        reads.append(since_snap + 1)
+
+    t0 = time.perf_counter()
+    for v, d in enumerate(docs, start=1):
+        got = main.load_resume_version("bench", v)
+        assert json.dumps(got) == json.dumps(d), f"version {v} did not round-trip"
+    all_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for _ in range(200):
+        main.load_latest_resume_view("bench")
+    latest_us = (time.perf_counter() - t0) / 200 * 1e6
+
+    full_bytes = sum(len(json.dumps(d)) for d in docs)
+    print(f"{mode:<6} stored={stored / 1024:9.1f} KiB ({stored / full_bytes:6.1%} of full)  "
+          f"snapshots={encodings.count('full'):4d}  rows/load avg={sum(reads) / len(reads):5.2f} max={max(reads):3d}  "
+          f"load latest={latest_us:7.1f} us  load any={all_s / len(docs) * 1e6:7.1f} us  save={save_s / len(docs) * 1e6:7.1f} us")
+
+
+def main_():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--versions", type=int, default=1000)
+    ap.add_argument("--snapshot-every", type=int, default=20)
+    args = ap.parse_args()
+
+    docs = history(args.versions)
+    tmp = tempfile.mkdtemp()
+    check_frozen_diff(docs[0])
+    print(f"{args.versions} versions, snapshot every {args.snapshot_every}")
+    run("full", docs, args.snapshot_every, os.path.join(tmp, "full.db"))
+    run("delta", docs, args.snapshot_every, os.path.join(tmp, "delta.db"))
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,155 @@
+"""
+Local stand-in for the OpenAI chat completions API, for benchmarks.
+
+Answers POST /v1/chat/completions with canned gap-question or ApplyOps payloads
+(picked from the request's response_format) after a configurable latency, and can
+inject the failures the backend has to handle: 400 on json_schema requests, 429,
+and malformed JSON content. Streaming requests get the same content as SSE chunks.
+
+    cd backend && python benchmarks/fake_openai.py --port 8900 --latency 0.5 --rate-429 0.05
+    OPENAI_BASE_URL=http://127.0.0.1:8900/v1 OPENAI_API_KEY=fake uvicorn main:app
+"""
+import argparse, asyncio, json, random, threading, time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+GAP_PAYLOAD = {"questions": [
+    {"question": "Which SQL tools did you use, and at what data volume?", "jd_gap": "SQL",
+     "gap_reason": "SQL appears only in skills.", "coverage_status": "weak", "response_tier": "highlight",
+     "target_section": "work", "skill_tags": ["SQL"]},
+    {"question": "Have you deployed services on AWS? Which ones?", "jd_gap": "AWS",
+     "gap_reason": "No cloud platform mentioned.", "coverage_status": "missing", "response_tier": "skill"},
+    {"question": "What did your Kafka consumers process, and how fast?", "jd_gap": "Kafka",
+     "gap_reason": "Streaming experience not shown.", "coverage_status": "missing", "response_tier": "context"},
+]}
+OPS_PAYLOAD = {"operations": [
+    {"op": "add_highlight", "section": "work", "anchor": "Acme", "text": "Built SQL dashboards used by 40 analysts."},
+    {"op": "add_skill_keywords", "keywords": ["SQL", "AWS", "Kafka"]},
+    {"op": "update_summary", "mode": "append", "text": "Ships data pipelines end to end."},
+]}
+MALFORMED = '{"questions": [{"question": "truncated'
+
+
+class FakeConfig:
+    def __init__(self, latency=0.2, jitter=0.0, schema_400=0.0, rate_429=0.0, malformed=0.0,
+                 gap_payload=None, ops_payload=None, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.schema_400 = schema_400
+        self.rate_429 = rate_429
+        self.malformed = malformed
+        self.gap_payload = gap_payload or GAP_PAYLOAD
+        self.ops_payload = ops_payload or OPS_PAYLOAD
+        self.rng = random.Random(seed)
+
+    def as_dict(self) -> dict:
+        return {k: getattr(self, k) for k in ("latency", "jitter", "schema_400", "rate_429", "malformed")}
+
+
+class FakeStats:
+    def __init__(self):
+        self.counts = {}
+        self._lock = threading.Lock()
+
+    def bump(self, key: str):
+        with self._lock:
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+
+def _error(status: int, message: str, code: str) -> JSONResponse:
+    return JSONResponse(status_code=status, content={"error": {"message": message, "type": code, "code": code}})
+
+
+def make_app(cfg: FakeConfig) -> FastAPI:
+    app = FastAPI(title="fake-openai")
+    app.state.stats = stats = FakeStats()
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        fmt = body.get("response_format") or {}
+        is_schema = fmt.get("type") == "json_schema"
+        is_apply = "ApplyOps" in json.dumps(fmt)
+        stats.bump("requests")
+
+        await asyncio.sleep(max(0.0, cfg.latency + cfg.rng.uniform(-cfg.jitter, cfg.jitter)))
+
+        if cfg.rng.random() < cfg.rate_429:
+            stats.bump("429")
+            return _error(429, "Rate limit reached (injected).", "rate_limit_exceeded")
+        if is_schema and cfg.rng.random() < cfg.schema_400:
+            stats.bump("400_schema")
+            return _error(400, "response_format json_schema is not supported (injected).", "invalid_request_error")
+
+        if cfg.rng.random() < cfg.malformed:
+            stats.bump("malformed")
+            content = MALFORMED
+        else:
+            content = json.dumps(cfg.ops_payload if is_apply else cfg.gap_payload)
+
+        prompt_chars = sum(len(str(m.get("content") or "")) for m in body.get("messages") or [])
+        usage = {"prompt_tokens": prompt_chars // 4, "completion_tokens": len(content) // 4,
+                 "total_tokens": prompt_chars // 4 + len(content) // 4}
+        base = {"id": f"chatcmpl-fake-{time.monotonic_ns()}", "created": int(time.time()), "model": body.get("model", "fake")}
+
+        if body.get("stream"):
+            stats.bump("stream")
+
+            async def chunks():
+                step = max(1, len(content) // 8)
+                for i in range(0, len(content), step):
+                    delta = {"content": content[i:i + step]}
+                    yield "data: " + json.dumps({**base, "object": "chat.completion.chunk",
+                                                 "choices": [{"index": 0, "delta": delta, "finish_reason": None}]}) + "\n\n"
+                yield "data: " + json.dumps({**base, "object": "chat.completion.chunk",
+                                             "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}) + "\n\n"
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(chunks(), media_type="text/event-stream")
+
+        stats.bump("ok")
+        return {**base, "object": "chat.completion", "usage": usage, "choices": [
+            {"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}
+        ]}
+
+    @app.get("/stats")
+    def fake_stats():
+        return stats.counts
+
+    return app
+
+
+def add_fake_args(ap: argparse.ArgumentParser) -> None:
+    ap.add_argument("--latency", type=float, default=0.2, help="seconds per completion")
+    ap.add_argument("--jitter", type=float, default=0.0, help="+/- seconds, uniform")
+    ap.add_argument("--schema-400", type=float, default=0.0, help="probability a json_schema request gets 400")
+    ap.add_argument("--rate-429", type=float, default=0.0, help="probability of a 429")
+    ap.add_argument("--malformed", type=float, default=0.0, help="probability of malformed JSON content")
+    ap.add_argument("--gap-payload", help="JSON file replacing the canned gap-question payload")
+    ap.add_argument("--ops-payload", help="JSON file replacing the canned ApplyOps payload")
+    ap.add_argument("--seed", type=int, default=0)
+
+
+def config_from_args(args) -> FakeConfig:
+    def load(path):
+        if not path:
+            return None
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    return FakeConfig(args.latency, args.jitter, args.schema_400, args.rate_429, args.malformed,
+                      load(args.gap_payload), load(args.ops_payload), args.seed)
+
+
+def main_():
+    import uvicorn
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8900)
+    add_fake_args(ap)
+    args = ap.parse_args()
+    uvicorn.run(make_app(config_from_args(args)), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main_()
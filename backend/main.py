@@ -658,32 +658,377 @@
 
 # main.py — FastAPI + sqlite3 storage, JSON Resume aware
 from __future__ import annotations
-from difflib import get_close_matches
-from typing import Dict, List, Optional, Literal, Tuple
+from difflib import SequenceMatcher, get_close_matches
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Literal, Tuple
 from datetime import datetime
-from fastapi import FastAPI, HTTPException, Query
+from collections import Counter, OrderedDict, deque
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
+from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel, ValidationError
-import sqlite3, json, os, copy, re
+import sqlite3, json, os, copy, re, hashlib, threading, time, asyncio, zlib, bisect, functools
+from contextvars import ContextVar
+from contextlib import aclosing, asynccontextmanager, contextmanager
 DEBUG_GAPS = os.environ.get("DEBUG_GAPS", "0") == "1"
 
 from dotenv import load_dotenv
 load_dotenv()
 
-from openai import OpenAI, APIConnectionError, RateLimitError, APIStatusError
+from openai import AsyncOpenAI, APIConnectionError, APITimeoutError, RateLimitError, APIStatusError
+import httpx
 
 # ----- Config -----
-client = OpenAI(timeout=60, max_retries=2)
+# The only OpenAI client: endpoints await it, so an in-flight LLM call doesn't pin a threadpool worker
+aclient = AsyncOpenAI(timeout=60, max_retries=2)
 
 DB_PATH = os.environ.get("RESUME_DB", "resumes.db")
+# SQLite tuning for the pooled connections (see get_conn)
+SQLITE_SYNCHRONOUS = os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL").upper()  # NORMAL is durable enough under WAL
+SQLITE_MMAP_SIZE = int(os.environ.get("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_KB = int(os.environ.get("SQLITE_CACHE_KB", "16384"))
+SQLITE_STATEMENT_CACHE = int(os.environ.get("SQLITE_STATEMENT_CACHE", "256"))
+# "full" stores every version as JSON; "delta" stores zlib-compressed JSON Patches
+# against the previous version with a full snapshot at least every RESUME_SNAPSHOT_EVERY versions
+RESUME_STORAGE = os.environ.get("RESUME_STORAGE", "full")
+RESUME_SNAPSHOT_EVERY = max(1, int(os.environ.get("RESUME_SNAPSHOT_EVERY", "20")))
+# Parsed latest resume per user kept in process (LRU over users)
+RESUME_CACHE_SIZE = int(os.environ.get("RESUME_CACHE_SIZE", "512"))
 # For question generation
 OPENAI_MODEL = os.environ.get("OPENAI_MODEL", "gpt-5-mini")
 # For answer application/routing (deliberate reasoning)
 APPLY_MODEL = os.environ.get("OPENAI_APPLY_MODEL", "gpt-5-thinking")
+# Gap-question cache: in-memory LRU in front of an optional table in DB_PATH
+GAP_CACHE_SIZE = int(os.environ.get("GAP_CACHE_SIZE", "256"))
+GAP_CACHE_TTL = int(os.environ.get("GAP_CACHE_TTL", str(7 * 24 * 3600)))  # seconds
+GAP_CACHE_SQLITE = os.environ.get("GAP_CACHE_SQLITE", "1") == "1"
+GAP_CACHE_SQLITE_MAX = int(os.environ.get("GAP_CACHE_SQLITE_MAX", "5000"))
+# /analyze/gaps/batch: default and ceiling for concurrent model calls per batch
+GAP_BATCH_CONCURRENCY = int(os.environ.get("GAP_BATCH_CONCURRENCY", "4"))
+GAP_BATCH_MAX_CONCURRENCY = int(os.environ.get("GAP_BATCH_MAX_CONCURRENCY", "16"))
+GAP_BATCH_MAX_JDS = int(os.environ.get("GAP_BATCH_MAX_JDS", "100"))
+# /analyze/gaps default mode: "llm", "local" (deterministic, no network) or "local-then-llm"
+GAP_MODE = os.environ.get("GAP_MODE", "llm")
+# In "llm" mode, answer from the local analyzer when OpenAI is unreachable/rate-limited/erroring
+GAP_LOCAL_FALLBACK = os.environ.get("GAP_LOCAL_FALLBACK", "1") == "1"
+# Gap-question call strategy: one wall-clock budget per request covering every model call
+# (schema attempt, json_object fallback, empty-result second pass, retries), streamed or not
+GAP_DEADLINE_S = float(os.environ.get("GAP_DEADLINE_S", "45"))
+GAP_SECOND_PASS_MIN_S = float(os.environ.get("GAP_SECOND_PASS_MIN_S", "3"))  # skip the second pass with less left
+# Outage-like gap-call failures retried inside that budget (the SDK's own retries are off there)
+GAP_RETRIES = int(os.environ.get("GAP_RETRIES", "2"))
+# After a json_schema 400, go straight to json_object for this model for this long (seconds)
+SCHEMA_UNSUPPORTED_TTL = float(os.environ.get("SCHEMA_UNSUPPORTED_TTL", "3600"))
+# Hedge: fire a duplicate request once the first outlives this percentile of recent latencies (0 = off)
+GAP_HEDGE_PERCENTILE = float(os.environ.get("GAP_HEDGE_PERCENTILE", "0"))
+GAP_HEDGE_MIN_SAMPLES = int(os.environ.get("GAP_HEDGE_MIN_SAMPLES", "20"))
+# Circuit breaker shared by every OpenAI call: opens after LLM_BREAKER_FAILURES failures within
+# LLM_BREAKER_WINDOW_S, fails fast for LLM_BREAKER_COOLDOWN_S, then lets one probe through
+LLM_BREAKER_FAILURES = int(os.environ.get("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_WINDOW_S = float(os.environ.get("LLM_BREAKER_WINDOW_S", "30"))
+LLM_BREAKER_COOLDOWN_S = float(os.environ.get("LLM_BREAKER_COOLDOWN_S", "30"))
+# /generate/jobs: workers per process (0 = enqueue only), lease length and retry limit
+GENERATE_WORKERS = int(os.environ.get("GENERATE_WORKERS", "2"))
+GENERATE_JOB_LEASE_S = float(os.environ.get("GENERATE_JOB_LEASE_S", "120"))
+GENERATE_JOB_MAX_ATTEMPTS = int(os.environ.get("GENERATE_JOB_MAX_ATTEMPTS", "3"))
+GENERATE_JOB_POLL_S = float(os.environ.get("GENERATE_JOB_POLL_S", "1.0"))
+# A failed attempt is retried after this many seconds, doubling per attempt
+GENERATE_JOB_BACKOFF_S = float(os.environ.get("GENERATE_JOB_BACKOFF_S", "5"))
+# Approximate token budget for the resume part of LLM prompts; 0 sends the resume unpruned
+PROMPT_RESUME_TOKENS = int(os.environ.get("PROMPT_RESUME_TOKENS", "1500"))
+# Extra skill lexicon merged over the built-in table: a JSON file with any of
+# {"skills": {canonical: [aliases]}, "verbs": [...], "signals": [...]}; its entries win on conflicts
+SKILL_LEXICON_PATH = os.environ.get("SKILL_LEXICON_PATH", "")
+# /generate default: "llm" (model ops, lexicon routing if the call fails) or "local" (lexicon routing only)
+APPLY_MODE = os.environ.get("APPLY_MODE", "llm")
+# Pre-built frontend (frontend/build) served from this app; empty = API only (dev runs the CRA server)
+FRONTEND_BUILD_DIR = os.environ.get("FRONTEND_BUILD_DIR", "")
+# On shutdown, running /generate jobs get this long to finish before being cancelled and requeued
+SHUTDOWN_GRACE_S = float(os.environ.get("SHUTDOWN_GRACE_S", "20"))
+# JSON codec for storage, prompts and responses: "auto" (orjson when installed), "orjson" or "stdlib"
+JSON_BACKEND = os.environ.get("JSON_BACKEND", "auto").lower()
+
+# ----- Serialization -----
+# Everything that turns resumes, ops, questions or payloads into JSON (or back) goes through
+# json_dumpb (bytes for rows and HTTP bodies) / json_dumps (text for prompts and SSE) / json_loads.
+# Output is compact; json_dumps never escapes non-ASCII (escapes cost prompt tokens), while the
+# stdlib json_dumpb does, since its C encoder is fastest producing ASCII.
+try:
+    import orjson
+except ImportError:  # optional; the stdlib codec is always available
+    orjson = None
+if JSON_BACKEND == "orjson" and orjson is None:
+    raise RuntimeError("JSON_BACKEND=orjson but orjson is not installed")
+
+_STDLIB_ENCODER = json.JSONEncoder(separators=(",", ":"))
+_STDLIB_TEXT_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+def _stdlib_dumpb(obj) -> bytes:
+    return _STDLIB_ENCODER.encode(obj).encode("ascii")
+
+if orjson is not None and JSON_BACKEND != "stdlib":
+    JSON_CODEC = "orjson"
+
+    def json_dumpb(obj) -> bytes:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        except orjson.JSONEncodeError:
+            return _stdlib_dumpb(obj)  # e.g. ints beyond 64 bits, which orjson refuses
+
+    def json_dumps(obj) -> str:
+        return json_dumpb(obj).decode("utf-8")
+
+    json_loads = orjson.loads  # str, bytes or memoryview; raises a json.JSONDecodeError subclass
+else:
+    JSON_CODEC = "stdlib"
+    json_dumpb = _stdlib_dumpb
+    json_dumps = _STDLIB_TEXT_ENCODER.encode
+    json_loads = json.loads
+
+class FastJSONResponse(Response):
+    """JSONResponse rendered by json_dumpb, for endpoints without a response_model
+    (those already get Pydantic's direct-to-bytes path)."""
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return json_dumpb(content)
+
+# ----- Metrics (Prometheus text exposition, per process) -----
+_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def _fmt_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = []
+    for n, v in zip(names, values):
+        v = v.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+        parts.append(f'{n}="{v}"')
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _fmt_num(v: float) -> str:
+    return str(int(v)) if float(v).is_integer() else repr(float(v))
+
+class MetricCounter:
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        self.name, self.help, self.labelnames = name, help_text, labelnames
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+        METRICS.append(self)
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(str(labels.get(n, "")) for n in self.labelnames), 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, v in sorted(self._values.items()):
+                lines.append(f"{self.name}{_fmt_labels(self.labelnames, key)} {_fmt_num(v)}")
+        return lines
+
+class MetricHistogram:
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = _LATENCY_BUCKETS):
+        self.name, self.help, self.labelnames, self.buckets = name, help_text, labelnames, buckets
+        self._series: Dict[Tuple[str, ...], List] = {}  # key -> [per-bucket counts (+Inf last), sum, count]
+        self._lock = threading.Lock()
+        METRICS.append(self)
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            s = self._series.get(key)
+            if s is None:
+                s = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            s[0][idx] += 1
+            s[1] += value
+            s[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, n) in sorted(self._series.items()):
+                cum = 0
+                for bound, c in zip(self.buckets + (float("inf"),), counts):
+                    cum += c
+                    le = 'le="%s"' % ("+Inf" if bound == float("inf") else repr(bound))
+                    lines.append(f"{self.name}_bucket{_fmt_labels(self.labelnames, key, le)} {cum}")
+                lines.append(f"{self.name}_sum{_fmt_labels(self.labelnames, key)} {repr(total)}")
+                lines.append(f"{self.name}_count{_fmt_labels(self.labelnames, key)} {n}")
+        return lines
+
+METRICS: List = []
+STAGE_SECONDS = MetricHistogram(
+    "rivoney_stage_seconds",
+    "Time spent per request stage (db_load, prompt_build, llm_call, parse_normalize, op_apply, merge).",
+    ("stage",),
+)
+GAP_SCHEMA_FALLBACKS = MetricCounter(
+    "rivoney_gap_schema_fallback_total", "Gap requests retried as json_object after json_schema was rejected (400).", ("path",))
+GAP_SECOND_PASSES = MetricCounter(
+    "rivoney_gap_second_pass_total", "Gap requests that parsed to nothing and took the json_object second pass.", ("path",))
+APPLY_FALLBACKS = MetricCounter(
+    "rivoney_apply_fallback_total", "Apply calls that failed and were routed by local_apply_ops instead.")
+LLM_TOKENS = MetricCounter(
+    "rivoney_llm_tokens_total", "Tokens reported by resp.usage.", ("model", "kind"))
+PROMPT_TOKENS_SAVED = MetricCounter(
+    "rivoney_prompt_tokens_saved_total", "Approximate resume tokens kept out of prompts by project_resume.")
+GAP_HEDGES = MetricCounter(
+    "rivoney_gap_hedged_total", "Gap calls that outlived the hedge threshold and got a duplicate request.", ("winner",))
+GAP_DEADLINES = MetricCounter(
+    "rivoney_gap_deadline_exceeded_total", "Gap requests that ran out of GAP_DEADLINE_S.")
+GAP_SCHEMA_SKIPS = MetricCounter(
+    "rivoney_gap_schema_skipped_total", "json_schema attempts skipped because the model is known not to support it.")
+SINGLEFLIGHT_COALESCED = MetricCounter(
+    "rivoney_singleflight_coalesced_total", "Calls that joined an identical in-flight call instead of starting one.", ("flight",))
+NOT_MODIFIED = MetricCounter(
+    "rivoney_not_modified_total", "Conditional GETs answered 304 from the version probe alone.", ("endpoint",))
+
+def timed(stage: str):
+    """Decorator: observe the wrapped (sync) function's wall time under rivoney_stage_seconds{stage=...}."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            with STAGE_SECONDS.time(stage=stage):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+def render_metrics() -> str:
+    lines: List[str] = []
+    for m in METRICS:
+        lines.extend(m.render())
+    return "\n".join(lines) + "\n"
+
+# ----- JSON Patch (RFC 6902 add/remove/replace) -----
+def _ptr_escape(key) -> str:
+    return str(key).replace("~", "~0").replace("/", "~1")
+
+def _ptr_unescape(part: str) -> str:
+    return part.replace("~1", "/").replace("~0", "~")
+
+def _json_equal(a, b) -> bool:
+    # Strict on scalars: True != 1 and 1 != 1.0 here, unlike ==, so round-trips are exact.
+    # Containers compare by isinstance, so a frozen cached view equals its plain copy.
+    if isinstance(a, dict):
+        return isinstance(b, dict) and list(a.keys()) == list(b.keys()) and all(_json_equal(a[k], b[k]) for k in a)
+    if isinstance(a, list):
+        return isinstance(b, list) and len(a) == len(b) and all(_json_equal(x, y) for x, y in zip(a, b))
+    return type(a) is type(b) and a == b
+
+def json_diff(a, b, path: str = "") -> List[Dict]:
+    """
+    Minimal-ish JSON Patch turning a into b. Lists diff by common prefix/suffix,
+    which covers the usual edit (append/replace a highlight) cheaply. Applying the
+    result with json_patch_apply reproduces b exactly, key order included.
+    """
+    if isinstance(a, dict) and isinstance(b, dict):
+        removed = [k for k in a if k not in b]
+        added = [k for k in b if k not in a]
+        expected_order = [k for k in a if k in b] + added
+        if expected_order != list(b.keys()):
+            # Reordered keys can't be expressed by add/remove without changing order
+            return [{"op": "replace", "path": path, "value": b}]
+        ops = [{"op": "remove", "path": f"{path}/{_ptr_escape(k)}"} for k in removed]
+        for k, v in b.items():
+            p = f"{path}/{_ptr_escape(k)}"
+            if k in a:
+                ops.extend(json_diff(a[k], v, p))
+            else:
+                ops.append({"op": "add", "path": p, "value": v})
+        return ops
+
+    if isinstance(a, list) and isinstance(b, list):
+        n = min(len(a), len(b))
+        i = 0
+        while i < n and _json_equal(a[i], b[i]):
+            i += 1
+        j = 0
+        while j < n - i and _json_equal(a[len(a) - 1 - j], b[len(b) - 1 - j]):
+            j += 1
+        a_mid, b_mid = a[i:len(a) - j], b[i:len(b) - j]
+        common = min(len(a_mid), len(b_mid))
+        ops = []
+        for k in range(common):
+            ops.extend(json_diff(a_mid[k], b_mid[k], f"{path}/{i + k}"))
+        for k in range(len(a_mid) - 1, common - 1, -1):
+            ops.append({"op": "remove", "path": f"{path}/{i + k}"})
+        for k in range(common, len(b_mid)):
+            ops.append({"op": "add", "path": f"{path}/{i + k}", "value": b_mid[k]})
+        return ops
+
+    if _json_equal(a, b):
+        return []
+    return [{"op": "replace", "path": path, "value": b}]
+
+def json_patch_apply(doc, ops: List[Dict]):
+    """Apply add/remove/replace ops in place (the root is returned, since path "" may replace it)."""
+    for op in ops:
+        path = op["path"]
+        if path == "":
+            doc = op.get("value")
+            continue
+        parts = [_ptr_unescape(p) for p in path.split("/")[1:]]
+        parent = doc
+        for p in parts[:-1]:
+            parent = parent[int(p)] if isinstance(parent, list) else parent[p]
+        last = parts[-1]
+        kind = op["op"]
+        if isinstance(parent, list):
+            idx = len(parent) if last == "-" else int(last)
+            if kind == "add":
+                parent.insert(idx, op["value"])
+            elif kind == "remove":
+                del parent[idx]
+            else:
+                parent[idx] = op["value"]
+        else:
+            if kind == "remove":
+                del parent[last]
+            else:
+                parent[last] = op["value"]
+    return doc
 
 # ----- DB -----
-def get_conn():
-    return sqlite3.connect(DB_PATH)
+_db_local = threading.local()
+
+def _open_conn(path: str) -> sqlite3.Connection:
+    con = sqlite3.connect(path, timeout=30, cached_statements=SQLITE_STATEMENT_CACHE)
+    con.execute("PRAGMA journal_mode=WAL")
+    sync = SQLITE_SYNCHRONOUS if SQLITE_SYNCHRONOUS in ("OFF", "NORMAL", "FULL", "EXTRA") else "NORMAL"
+    con.execute(f"PRAGMA synchronous={sync}")
+    con.execute(f"PRAGMA mmap_size={int(SQLITE_MMAP_SIZE)}")
+    con.execute(f"PRAGMA cache_size=-{int(SQLITE_CACHE_KB)}")
+    con.execute("PRAGMA temp_store=MEMORY")
+    return con
+
+def get_conn() -> sqlite3.Connection:
+    """
+    Pooled per thread: each threadpool worker keeps one open, WAL-mode connection
+    (and with it sqlite3's prepared-statement cache). `with get_conn() as con:`
+    still commits or rolls back per block; it never closes the connection.
+    """
+    con = getattr(_db_local, "con", None)
+    if con is None or _db_local.path != DB_PATH:
+        if con is not None:
+            con.close()
+        con = _open_conn(DB_PATH)
+        _db_local.con = con
+        _db_local.path = DB_PATH
+    return con
 
 def init_db():
     with get_conn() as con:
@@ -698,24 +1043,432 @@ def init_db():
             )
             """
         )
+        con.execute(
+            """
+            CREATE TABLE IF NOT EXISTS gap_cache (
+              key TEXT PRIMARY KEY,
+              payload TEXT NOT NULL,
+              created_at REAL NOT NULL,
+              last_access REAL NOT NULL
+            )
+            """
+        )
+        con.execute("CREATE INDEX IF NOT EXISTS idx_gap_cache_last_access ON gap_cache(last_access)")
+        con.execute(
+            """
+            CREATE TABLE IF NOT EXISTS apply_ops (
+              ops_id TEXT PRIMARY KEY,
+              user_id TEXT NOT NULL,
+              baseline_version INTEGER NOT NULL,
+              jd_hash TEXT NOT NULL,
+              qa_hash TEXT NOT NULL,
+              model TEXT NOT NULL,
+              operations TEXT NOT NULL,
+              created_at TEXT NOT NULL
+            )
+            """
+        )
+        con.execute(
+            """
+            CREATE TABLE IF NOT EXISTS generate_jobs (
+              job_id TEXT PRIMARY KEY,
+              user_id TEXT NOT NULL,
+              status TEXT NOT NULL,          -- queued | running | done | failed
+              request TEXT NOT NULL,         -- GenerateRequest JSON
+              result TEXT,                   -- GenerateResponse JSON once done
+              error TEXT,
+              attempts INTEGER NOT NULL DEFAULT 0,
+              lease_owner TEXT,
+              lease_until REAL,
+              created_at REAL NOT NULL,
+              updated_at REAL NOT NULL
+            )
+            """
+        )
+        con.execute("CREATE INDEX IF NOT EXISTS idx_generate_jobs_status ON generate_jobs(status, created_at)")
+    migrate_db()
+
+# ----- Migrations -----
+# Applied in order; PRAGMA user_version records how many have run on a given file.
+def _migrate_resume_version_index(con: sqlite3.Connection) -> None:
+    # Older files may hold duplicate (user_id, version) pairs from racing saves.
+    # Renumber just those users' rows in insertion order (no rows are dropped)
+    # so the unique index can be built.
+    dup_users = [r[0] for r in con.execute(
+        "SELECT DISTINCT user_id FROM resumes GROUP BY user_id, version HAVING COUNT(*) > 1"
+    ).fetchall()]
+    for user_id in dup_users:
+        rows = con.execute(
+            "SELECT id, version FROM resumes WHERE user_id = ? ORDER BY version, id", (user_id,)
+        ).fetchall()
+        counts = Counter(v for _, v in rows)
+        remap = {}
+        for n, (rid, old) in enumerate(rows, start=1):
+            con.execute("UPDATE resumes SET version = ? WHERE id = ?", (n, rid))
+            if counts[old] == 1:
+                remap[old] = n
+        # Stored ops name their baseline by version: follow the renumbering (re-keying ops_id,
+        # which hashes the version) and drop ops whose old number was shared by several rows,
+        # since there's no telling which of them they were made against
+        for ops_id, old, jd_hash, qa_hash, model in con.execute(
+            "SELECT ops_id, baseline_version, jd_hash, qa_hash, model FROM apply_ops WHERE user_id = ?", (user_id,)
+        ).fetchall():
+            new = remap.get(old)
+            if new is None:
+                con.execute("DELETE FROM apply_ops WHERE ops_id = ?", (ops_id,))
+            elif new != old:
+                new_id = hashlib.sha256("\x00".join([user_id, str(new), jd_hash, qa_hash, model]).encode("utf-8")).hexdigest()
+                con.execute("UPDATE OR REPLACE apply_ops SET baseline_version = ?, ops_id = ? WHERE ops_id = ?",
+                            (new, new_id, ops_id))
+    con.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_resumes_user_version ON resumes(user_id, version)")
+
+def _migrate_resume_encoding(con: sqlite3.Connection) -> None:
+    # 'full' = JSON text, 'delta' = zlib(JSON Patch vs previous version); existing rows are full
+    con.execute("ALTER TABLE resumes ADD COLUMN encoding TEXT NOT NULL DEFAULT 'full'")
+
+def _migrate_resume_version_meta_index(con: sqlite3.Connection) -> None:
+    # Covering index for version listings: created_at/encoding sit after json_resume in the row,
+    # so reading them from the table would walk each blob's overflow pages
+    con.execute(
+        "CREATE INDEX IF NOT EXISTS idx_resumes_user_version_meta ON resumes(user_id, version, created_at, encoding)"
+    )
+
+# kind, resume section, fields tried in order for the display name
+_ANCHOR_FIELDS = (
+    ("work", "work", ("name", "company")),
+    ("project", "projects", ("name",)),
+    ("institution", "education", ("institution",)),
+    ("certificate", "certificates", ("name",)),
+)
+
+def resume_anchors(resume: Dict) -> List[Tuple[str, int, str]]:
+    """(kind, position, name) rows for resume_anchors: distinct names per kind, in résumé order."""
+    rows = []
+    for kind, section, fields in _ANCHOR_FIELDS:
+        seen = set()
+        for entry in resume.get(section) or []:
+            if not isinstance(entry, dict):
+                continue
+            name = next((entry[f] for f in fields if entry.get(f)), None)
+            if not isinstance(name, str) or not name.strip() or name in seen:
+                continue
+            seen.add(name)
+            rows.append((kind, len(seen) - 1, name))
+    return rows
+
+def _migrate_resume_anchors(con: sqlite3.Connection) -> None:
+    # Side table of anchor names per version, so /template/options never reads the JSON blob.
+    # Backfill walks each user's versions in order, replaying deltas on the previous document.
+    con.execute(
+        """
+        CREATE TABLE IF NOT EXISTS resume_anchors (
+          user_id TEXT NOT NULL,
+          version INTEGER NOT NULL,
+          kind TEXT NOT NULL,            -- work | project | institution | certificate
+          position INTEGER NOT NULL,     -- order within the kind
+          name TEXT NOT NULL,
+          PRIMARY KEY (user_id, version, kind, position)
+        ) WITHOUT ROWID
+        """
+    )
+    # A user's first version is always full, so every delta finds its predecessor in `doc`.
+    user, doc = None, None
+    for user_id, version, encoding, payload in con.execute(
+        "SELECT user_id, version, encoding, json_resume FROM resumes ORDER BY user_id, version"
+    ):
+        if encoding != "delta":
+            doc = json_loads(payload)
+        elif user == user_id:
+            doc = json_patch_apply(doc, json_loads(zlib.decompress(payload)))
+        else:
+            continue
+        user = user_id
+        con.executemany(
+            "INSERT OR REPLACE INTO resume_anchors (user_id, version, kind, position, name) VALUES (?, ?, ?, ?, ?)",
+            [(user_id, version) + row for row in resume_anchors(doc)],
+        )
+
+def _migrate_generate_jobs_run_after(con: sqlite3.Connection) -> None:
+    # Earliest time (epoch seconds) a queued job may be claimed; retries back off through it
+    con.execute("ALTER TABLE generate_jobs ADD COLUMN run_after REAL NOT NULL DEFAULT 0")
+
+_MIGRATIONS = [
+    _migrate_resume_version_index,
+    _migrate_resume_encoding,
+    _migrate_resume_version_meta_index,
+    _migrate_resume_anchors,
+    _migrate_generate_jobs_run_after,
+]
+
+def migrate_db() -> None:
+    con = get_conn()
+    with con:
+        # IMMEDIATE takes the write lock up front so concurrent workers migrate one at a time
+        con.execute("BEGIN IMMEDIATE")
+        current = con.execute("PRAGMA user_version").fetchone()[0]
+        for n, step in enumerate(_MIGRATIONS[current:], start=current + 1):
+            step(con)
+            con.execute(f"PRAGMA user_version = {n}")
+
 init_db()
 
-def next_version_for(user_id: str) -> int:
+def _decode_delta(blob) -> List[Dict]:
+    return json_loads(zlib.decompress(blob))
+
+def _reconstruct(con: sqlite3.Connection, user_id: str, version: int, encoding: str, payload) -> Dict:
+    """Materialize one stored version: parse it if full, else replay deltas from the nearest snapshot."""
+    if encoding != "delta":
+        return json_loads(payload)
+    snap = con.execute(
+        "SELECT version, json_resume FROM resumes "
+        "WHERE user_id = ? AND version < ? AND encoding = 'full' ORDER BY version DESC LIMIT 1",
+        (user_id, version),
+    ).fetchone()
+    doc = json_loads(snap[1])
+    for (blob,) in con.execute(
+        "SELECT json_resume FROM resumes WHERE user_id = ? AND version > ? AND version < ? ORDER BY version",
+        (user_id, snap[0], version),
+    ):
+        doc = json_patch_apply(doc, _decode_delta(blob))
+    return json_patch_apply(doc, _decode_delta(payload))
+
+# ----- Latest-resume cache -----
+def _readonly(self, *args, **kwargs):
+    raise TypeError("cached resume is read-only; copy.deepcopy() it before editing")
+
+class _FrozenDict(dict):
+    """dict that refuses mutation; still a dict for json.dumps, pydantic and isinstance checks."""
+    __slots__ = ()
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __copy__(self):
+        return dict(self)  # top level mutable; nested values stay frozen
+
+    def __deepcopy__(self, memo):
+        return _thaw(self)
+
+class _FrozenList(list):
+    __slots__ = ()
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _readonly
+    append = extend = insert = pop = remove = clear = sort = reverse = _readonly
+
+    def __copy__(self):
+        return list(self)
+
+    def __deepcopy__(self, memo):
+        return _thaw(self)
+
+def _freeze(obj):
+    if isinstance(obj, dict):
+        return _FrozenDict((k, _freeze(v)) for k, v in obj.items())
+    if isinstance(obj, list):
+        return _FrozenList(_freeze(v) for v in obj)
+    return obj
+
+def _thaw(obj):
+    """Plain, mutable deep copy of JSON-shaped data (frozen or not); ~3x faster than copy.deepcopy."""
+    if isinstance(obj, dict):
+        return {k: _thaw(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_thaw(v) for v in obj]
+    return obj
+
+class _LatestResumeCache:
+    """
+    Per-user (version, frozen resume, encoded JSON or None), LRU-bounded. Hits require
+    the caller's version to match. The encoded bytes are what /resume/latest sends.
+    """
+    def __init__(self, max_users: int):
+        self.max_users = max_users
+        self._data: "OrderedDict[str, Tuple[int, Dict, Optional[bytes]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: str, version: int) -> Optional[Dict]:
+        with self._lock:
+            entry = self._data.get(user_id)
+            if entry is not None and entry[0] == version:
+                self._data.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def get_encoded(self, user_id: str, version: int) -> Optional[bytes]:
+        with self._lock:
+            entry = self._data.get(user_id)
+            return entry[2] if entry is not None and entry[0] == version else None
+
+    def put(self, user_id: str, version: int, view: Dict, encoded: Optional[bytes] = None) -> None:
+        if self.max_users <= 0:
+            return
+        with self._lock:
+            current = self._data.get(user_id)
+            if current is not None and current[0] > version:
+                return  # a newer save already landed
+            self._data[user_id] = (version, view, encoded)
+            self._data.move_to_end(user_id)
+            while len(self._data) > self.max_users:
+                self._data.popitem(last=False)
+
+    def set_encoded(self, user_id: str, version: int, encoded: bytes) -> None:
+        with self._lock:
+            entry = self._data.get(user_id)
+            if entry is not None and entry[0] == version:
+                self._data[user_id] = (version, entry[1], encoded)
+
+    def invalidate(self, user_id: str) -> None:
+        with self._lock:
+            self._data.pop(user_id, None)
+
+_RESUME_CACHE = _LatestResumeCache(RESUME_CACHE_SIZE)
+
+def insert_resume_version(user_id: str, resume: Dict, created_at: str) -> int:
+    """
+    Assign the next version and insert in one write transaction, so concurrent
+    saves for the same user can't both claim MAX(version) + 1.
+    """
+    encoded = json_dumpb(resume)
+    full_text = encoded.decode("utf-8")  # stored as TEXT
+    con = get_conn()
+    with con:
+        con.execute("BEGIN IMMEDIATE")
+        if RESUME_STORAGE != "delta":
+            cur = con.execute(
+                "INSERT INTO resumes (user_id, version, json_resume, created_at) "
+                "SELECT ?, COALESCE(MAX(version), 0) + 1, ?, ? FROM resumes WHERE user_id = ?",
+                (user_id, full_text, created_at, user_id),
+            )
+            version = con.execute("SELECT version FROM resumes WHERE id = ?", (cur.lastrowid,)).fetchone()[0]
+        else:
+            prev, last_snap = con.execute(
+                "SELECT MAX(version), MAX(CASE WHEN encoding = 'full' THEN version END) FROM resumes WHERE user_id = ?",
+                (user_id,),
+            ).fetchone()
+            version = (prev or 0) + 1
+            encoding, payload = "full", full_text
+            if prev and version - last_snap < RESUME_SNAPSHOT_EVERY:
+                prev_doc = _RESUME_CACHE.get(user_id, prev)
+                if prev_doc is None:
+                    enc, stored = con.execute(
+                        "SELECT encoding, json_resume FROM resumes WHERE user_id = ? AND version = ?", (user_id, prev)
+                    ).fetchone()
+                    prev_doc = _reconstruct(con, user_id, prev, enc, stored)
+                blob = zlib.compress(json_dumpb(json_diff(prev_doc, resume)), 6)
+                if len(blob) < len(encoded):
+                    encoding, payload = "delta", blob
+            con.execute(
+                "INSERT INTO resumes (user_id, version, json_resume, created_at, encoding) VALUES (?, ?, ?, ?, ?)",
+                (user_id, version, payload, created_at, encoding),
+            )
+        con.executemany(
+            "INSERT INTO resume_anchors (user_id, version, kind, position, name) VALUES (?, ?, ?, ?, ?)",
+            [(user_id, version) + row for row in resume_anchors(resume)],
+        )
+    # Write-through: the next read of this user skips the blob entirely
+    _RESUME_CACHE.put(user_id, version, _freeze(resume), encoded)
+    return version
+
+def load_latest_anchors(user_id: str) -> Tuple[Optional[int], Dict[str, List[str]]]:
+    """
+    (latest version, {kind: names}) in one query: the MAX(version) probe joined to the
+    resume_anchors primary key. Never reads json_resume; version is None with no resume.
+    """
     with get_conn() as con:
-        cur = con.execute("SELECT MAX(version) FROM resumes WHERE user_id = ?", (user_id,))
-        row = cur.fetchone()
-        return (row[0] or 0) + 1
+        rows = con.execute(
+            "SELECT r.version, a.kind, a.name FROM (SELECT MAX(version) AS version FROM resumes WHERE user_id = ?) AS r "
+            "LEFT JOIN resume_anchors AS a ON a.user_id = ? AND a.version = r.version "
+            "ORDER BY a.kind, a.position",
+            (user_id, user_id),
+        ).fetchall()
+    anchors: Dict[str, List[str]] = {kind: [] for kind, _, _ in _ANCHOR_FIELDS}
+    for _, kind, name in rows:
+        if kind is not None:
+            anchors.setdefault(kind, []).append(name)
+    return rows[0][0], anchors
+
+def latest_resume_version(user_id: str) -> Optional[int]:
+    """The user's latest version (None if they have none); an index-only probe, no blob read."""
+    with get_conn() as con:
+        return con.execute("SELECT MAX(version) FROM resumes WHERE user_id = ?", (user_id,)).fetchone()[0]
 
-def load_latest_resume(user_id: str) -> Dict:
+@timed("db_load")
+def load_latest_resume_versioned(user_id: str) -> Tuple[int, Dict]:
+    """
+    (version, read-only view) of the user's latest resume. The index-only MAX(version)
+    probe runs every time, so a save made by another worker is never served stale;
+    only the blob read and parse are skipped on a hit.
+    """
+    with get_conn() as con:
+        row = con.execute("SELECT MAX(version) FROM resumes WHERE user_id = ?", (user_id,)).fetchone()
+        version = row[0] if row else None
+        if version is None:
+            raise HTTPException(status_code=404, detail="No resume found for user")
+        cached = _RESUME_CACHE.get(user_id, version)
+        if cached is not None:
+            return version, cached
+        enc, payload = con.execute(
+            "SELECT encoding, json_resume FROM resumes WHERE user_id = ? AND version = ?",
+            (user_id, version),
+        ).fetchone()
+        view = _freeze(_reconstruct(con, user_id, version, enc, payload))
+    # A full row's text is already the response body; delta rows are encoded on first request
+    _RESUME_CACHE.put(user_id, version, view, payload.encode("utf-8") if enc != "delta" else None)
+    return version, view
+
+def load_latest_resume_encoded(user_id: str) -> Tuple[int, bytes]:
+    """(version, JSON bytes) of the latest resume, reusing the stored or cached encoding."""
+    version, view = load_latest_resume_versioned(user_id)
+    encoded = _RESUME_CACHE.get_encoded(user_id, version)
+    if encoded is None:
+        encoded = json_dumpb(view)
+        _RESUME_CACHE.set_encoded(user_id, version, encoded)
+    return version, encoded
+
+def load_latest_resume_view(user_id: str) -> Dict:
+    return load_latest_resume_versioned(user_id)[1]
+
+@timed("db_load")
+def load_resume_version(user_id: str, version: int) -> Dict:
     with get_conn() as con:
         cur = con.execute(
-            "SELECT json_resume FROM resumes WHERE user_id = ? ORDER BY version DESC LIMIT 1",
-            (user_id,),
+            "SELECT encoding, json_resume FROM resumes WHERE user_id = ? AND version = ?",
+            (user_id, version),
         )
         row = cur.fetchone()
         if not row:
-            raise HTTPException(status_code=404, detail="No resume found for user")
-        return json.loads(row[0])
+            raise HTTPException(status_code=404, detail=f"No resume version {version} for user")
+        return _reconstruct(con, user_id, version, row[0], row[1])
+
+def list_resume_versions(user_id: str, before: Optional[int] = None, limit: int = 50) -> List[Tuple[int, str, str]]:
+    """(version, created_at, encoding) newest first, strictly below `before`; answered from the covering index."""
+    with get_conn() as con:
+        return con.execute(
+            "SELECT version, created_at, encoding FROM resumes INDEXED BY idx_resumes_user_version_meta "
+            "WHERE user_id = ? AND version < ? ORDER BY version DESC LIMIT ?",
+            (user_id, before if before is not None else 2**62, limit),
+        ).fetchall()
+
+def diff_resume_versions(user_id: str, from_version: int, to_version: int) -> List[Dict]:
+    """JSON Patch taking version `from_version` to `to_version`."""
+    if to_version == from_version + 1:
+        # Adjacent versions in delta storage: the stored patch is exactly this diff
+        row = get_conn().execute(
+            "SELECT encoding, json_resume FROM resumes WHERE user_id = ? AND version = ?", (user_id, to_version)
+        ).fetchone()
+        if row and row[0] == "delta":
+            load_resume_version(user_id, from_version)  # 404 if the base is missing
+            return _decode_delta(row[1])
+    return json_diff(load_resume_version(user_id, from_version), load_resume_version(user_id, to_version))
+
+async def aload_latest_resume_view(user_id: str) -> Dict:
+    # sqlite3 is blocking; keep it off the event loop
+    return await run_in_threadpool(load_latest_resume_view, user_id)
+
+async def aload_latest_resume_versioned(user_id: str) -> Tuple[int, Dict]:
+    return await run_in_threadpool(load_latest_resume_versioned, user_id)
 
 # ----- Utilities -----
 def _ensure_list(obj, key):
@@ -725,33 +1478,95 @@ def _ensure_list(obj, key):
         obj[key] = val
     return val
 
-def _find_or_create_work_entry(tailored: Dict, experience_hint: Optional[str]) -> Dict:
-    work = tailored.setdefault("work", [])
-    if not isinstance(work, list):
-        work = []
-        tailored["work"] = work
+def _match_ratio(matches: int, length: int) -> float:
+    # difflib's _calculate_ratio, so bounds and scores round exactly the same way
+    return 2.0 * matches / length if length else 1.0
 
-    if not work:
-        work.append({})
-
-    if experience_hint:
-        names = []
-        for w in work:
-            nm = w.get("name") or w.get("company")
-            if nm:
-                names.append(nm)
-        match = None
-        if experience_hint in names:
-            idx = names.index(experience_hint)
-            match = work[idx]
+class _FuzzyIndex:
+    """
+    Reusable replacement for `get_close_matches(word, items, n=1, cutoff)[0]` plus
+    `items.index(...)`, for lists queried many times (anchors, highlights).
+
+    Per-string length and character counts are computed once; a query scores the
+    length and character-multiset upper bounds (difflib's real_quick_ratio and
+    quick_ratio) for every candidate, then runs SequenceMatcher only in bound order
+    until no remaining candidate can beat the best ratio. Results, including
+    get_close_matches' tie-break on the larger string, are identical to difflib.
+    """
+    def __init__(self, items: Optional[List] = None):
+        self.items: List = []
+        self._first: Dict[str, int] = {}
+        self._profiles: Dict[str, Tuple[int, Counter]] = {}
+        self._memo: Dict[Tuple[str, float], Optional[str]] = {}
+        self._plain = False  # non-string items present: defer to difflib as-is
+        if items:
+            self.sync(items)
+
+    def sync(self, items: List) -> "_FuzzyIndex":
+        """Bring the index in line with `items` (appends are incremental, anything else rebuilds)."""
+        if items == self.items:
+            return self
+        n = len(self.items)
+        if len(items) > n and items[:n] == self.items:
+            new = items[n:]
         else:
-            close = get_close_matches(experience_hint, names, n=1, cutoff=0.6)
-            if close:
-                idx = names.index(close[0])
-                match = work[idx]
-        if match:
-            return match
-    return work[0]
+            self.items, self._first, self._plain = [], {}, False
+            new = items
+        self._memo.clear()
+        for s in new:
+            if not isinstance(s, str):
+                self._plain = True
+            elif s not in self._first:
+                self._first[s] = len(self.items)
+                if s not in self._profiles:
+                    self._profiles[s] = (len(s), Counter(s))
+            self.items.append(s)
+        return self
+
+    def position(self, s) -> Optional[int]:
+        if self._plain:
+            return self.items.index(s) if s in self.items else None
+        return self._first.get(s)
+
+    def best(self, word: str, cutoff: float) -> Optional[str]:
+        key = (word, cutoff)
+        if key not in self._memo:
+            if self._plain:
+                close = get_close_matches(word, self.items, n=1, cutoff=cutoff)
+                self._memo[key] = close[0] if close else None
+            else:
+                self._memo[key] = self._search(word, cutoff)
+        return self._memo[key]
+
+    def _search(self, word: str, cutoff: float) -> Optional[str]:
+        lb = len(word)
+        wc = Counter(word)
+        bounded = []
+        for s in self._first:
+            la, counts = self._profiles[s]
+            total = la + lb
+            if _match_ratio(min(la, lb), total) < cutoff:
+                continue
+            if len(counts) < len(wc):
+                m = sum(min(v, wc[c]) for c, v in counts.items())
+            else:
+                m = sum(min(v, counts[c]) for c, v in wc.items())
+            ub = _match_ratio(m, total)
+            if ub >= cutoff:
+                bounded.append((ub, s))
+        bounded.sort(reverse=True)
+
+        sm = SequenceMatcher()
+        sm.set_seq2(word)
+        best_score, best = -1.0, None
+        for ub, s in bounded:
+            if ub < best_score:
+                break  # ratio <= ub, so nothing left can reach the current best
+            sm.set_seq1(s)
+            r = sm.ratio()
+            if r >= cutoff and (best is None or (r, s) > (best_score, best)):
+                best_score, best = r, s
+        return best
 
 def _normalize_skill_item(x):
     # Accepts strings, dict with name, or dict with keywords bucket.
@@ -791,17 +1606,18 @@ def _append_unique(lst: List[str], text: str, cap: Optional[int] = None):
     if cap is not None and len(lst) > cap:
         del lst[cap:]
 
-def _rewrite_or_add_highlight(entry: Dict, new_text: str, find_match: Optional[str] = None, cap: int = 10):
+def _rewrite_or_add_highlight(entry: Dict, new_text: str, find_match: Optional[str] = None, cap: int = 10,
+                              index: Optional[_FuzzyIndex] = None):
+    """`index` lets repeated calls on the same entry reuse its highlight profiles."""
     highlights = _ensure_list(entry, "highlights")
     if find_match:
         # Fuzzy replace: find the closest existing highlight
         target = None
         if highlights:
-            close = get_close_matches(find_match, highlights, n=1, cutoff=0.55)
-            if close:
-                target = close[0]
+            index = (index or _FuzzyIndex()).sync(highlights)
+            target = index.best(find_match, 0.55)
         if target:
-            idx = highlights.index(target)
+            idx = index.position(target)
             highlights[idx] = new_text if re.search(r"[.!?]$", new_text) else new_text + "."
             return
     _append_unique(highlights, new_text, cap=cap)
@@ -816,12 +1632,56 @@ def _dedupe_keep_order(seq: List[str]) -> List[str]:
     return out
 
 # ----- Merge -----
+def _hashable(x) -> bool:
+    try:
+        hash(x)
+        return True
+    except TypeError:
+        return False
+
+class _Members:
+    """
+    `x in lst` in O(1) for a list we only ever append to. Hashable items go through
+    a set (same hash/eq semantics as list membership); anything else falls back to
+    a scan so results match the plain `in` exactly.
+    """
+    __slots__ = ("lst", "seen")
+
+    def __init__(self, lst: List):
+        self.lst = lst
+        self.seen = {x for x in lst if _hashable(x)}
+
+    def __contains__(self, x) -> bool:
+        if _hashable(x):
+            return x in self.seen
+        return x in self.lst
+
+    def append(self, x) -> None:
+        self.lst.append(x)
+        if _hashable(x):
+            self.seen.add(x)
+
+def _members_of(cache: Dict[int, "_Members"], entry: Dict, key: str):
+    """Membership index for entry[key]; non-list values keep plain list/str semantics."""
+    lst = entry[key]
+    if type(lst) is not list:
+        return lst
+    m = cache.get(id(entry))
+    if m is None or m.lst is not lst:
+        m = cache[id(entry)] = _Members(lst)
+    return m
+
+@timed("merge")
 def merge_resumes(base: dict, generated: dict) -> dict:
     """
     Non-destructive merge: keep all identity/contact from base; append
     new highlights/skills/projects/certificates from generated (deduped).
+
+    Anchors, highlights and skill keywords are looked up through hash indexes built
+    once per call, so cost is linear in the size of both documents. Output is
+    identical to the original scan-based merge (see benchmarks/bench_merge.py).
     """
-    merged = copy.deepcopy(base)
+    merged = _thaw(base)
 
     # Basics.summary: enrich without overwriting
     gen_summary = (generated.get("basics") or {}).get("summary", "").strip()
@@ -833,6 +1693,8 @@ def merge_resumes(base: dict, generated: dict) -> dict:
 
     # Work: append non-duplicate highlights (match by name/company)
     merged.setdefault("work", [])
+    work_by_name: Optional[Dict] = None  # built on first named lookup; first entry per name wins
+    hl_members: Dict[int, _Members] = {}
     for gen_w in (generated.get("work") or []):
         gen_name = gen_w.get("name") or gen_w.get("company")
         gen_hls = list(gen_w.get("highlights") or [])
@@ -840,23 +1702,36 @@ def merge_resumes(base: dict, generated: dict) -> dict:
             continue
 
         if gen_name:
-            target = next((w for w in merged["work"] if (w.get("name") or w.get("company")) == gen_name), None)
+            if work_by_name is None:
+                work_by_name = {}
+                for w in merged["work"]:
+                    nm = w.get("name") or w.get("company")
+                    if nm and _hashable(nm):
+                        work_by_name.setdefault(nm, w)
+            if _hashable(gen_name):
+                target = work_by_name.get(gen_name)
+            else:
+                target = next((w for w in merged["work"] if (w.get("name") or w.get("company")) == gen_name), None)
             if target is None:
                 target = {"name": gen_name, "highlights": []}
                 merged["work"].append(target)
+                if _hashable(gen_name):
+                    work_by_name.setdefault(gen_name, target)
         else:
             if not merged["work"]:
                 merged["work"].append({"name": "", "highlights": []})
             target = merged["work"][0]
 
         target.setdefault("highlights", [])
+        existing = _members_of(hl_members, target, "highlights")
         for h in gen_hls:
             h = (h or "").strip()
-            if h and h not in target["highlights"]:
-                target["highlights"].append(h)
+            if h and h not in existing:
+                existing.append(h)
 
     # Projects: merge by name; append highlights or add project
     merged.setdefault("projects", [])
+    proj_by_name: Optional[Dict] = None
     for gen_p in (generated.get("projects") or []):
         pname = gen_p.get("name") or ""
         if not pname:
@@ -864,42 +1739,64 @@ def merge_resumes(base: dict, generated: dict) -> dict:
             if gen_p.get("highlights"):
                 merged["projects"].append(gen_p)
             continue
-        tgt = next((p for p in merged["projects"] if p.get("name") == pname), None)
+        if proj_by_name is None:
+            proj_by_name = {}
+            for p in merged["projects"]:
+                nm = p.get("name")
+                if nm and _hashable(nm):
+                    proj_by_name.setdefault(nm, p)
+        if _hashable(pname):
+            tgt = proj_by_name.get(pname)
+        else:
+            tgt = next((p for p in merged["projects"] if p.get("name") == pname), None)
         if tgt is None:
             merged["projects"].append(gen_p)
+            if _hashable(pname):
+                proj_by_name.setdefault(pname, gen_p)
         else:
             tgt.setdefault("highlights", [])
+            existing = _members_of(hl_members, tgt, "highlights")
             for h in (gen_p.get("highlights") or []):
-                if h not in tgt["highlights"]:
-                    tgt["highlights"].append(h)
+                if h not in existing:
+                    existing.append(h)
 
     # Skills: flatten into strings and keywords bucket only (no levels)
     merged.setdefault("skills", [])
     # Normalize existing skills
-    flat_existing = []
-    buckets = []
+    flat_existing = set()
     for s in merged["skills"]:
-        if isinstance(s, dict) and "keywords" in s:
-            buckets.append(s)
-        else:
+        if not (isinstance(s, dict) and "keywords" in s):
             nm = _normalize_skill_item(s)
             if nm:
-                flat_existing.append(nm)
+                flat_existing.add(nm)
 
-    # Add generated
+    # The bucket _add_skill_keywords_bucket would pick: first dict with a keywords list
+    bucket_kw = None
     for gs in (generated.get("skills") or []):
         if isinstance(gs, dict) and "keywords" in gs:
-            _add_skill_keywords_bucket(merged["skills"], gs.get("keywords") or [])
+            tags = gs.get("keywords") or []
+            if not tags:
+                continue
+            if bucket_kw is None:
+                bucket = next((s for s in merged["skills"] if isinstance(s, dict) and isinstance(s.get("keywords"), list)), None)
+                if bucket is None:
+                    bucket = {"name": "Core Skills", "keywords": []}
+                    merged["skills"].append(bucket)
+                bucket_kw = _Members(bucket["keywords"])
+            for t in tags:
+                v = (t or "").strip()
+                if v and v not in bucket_kw:
+                    bucket_kw.append(v)
         elif isinstance(gs, dict) and gs.get("name"):
             nm = (gs.get("name") or "").strip()
             if nm and nm not in flat_existing:
                 merged["skills"].append(nm)
-                flat_existing.append(nm)
+                flat_existing.add(nm)
         elif isinstance(gs, str):
             nm = gs.strip()
             if nm and nm not in flat_existing:
                 merged["skills"].append(nm)
-                flat_existing.append(nm)
+                flat_existing.add(nm)
 
     # Dedupe flat skills, preserve buckets
     new_flat = [x for x in merged["skills"] if not (isinstance(x, dict) and "keywords" in x)]
@@ -927,10 +1824,28 @@ class SaveResumeResponse(BaseModel):
     version: int
     created_at: str
 
+GapMode = Literal["local", "llm", "local-then-llm"]
+ApplyMode = Literal["llm", "local"]
+
+class ResumeVersionMeta(BaseModel):
+    version: int
+    created_at: str
+    encoding: str
+
+class ResumeVersionsResponse(BaseModel):
+    versions: List[ResumeVersionMeta]
+    next_before: Optional[int] = None  # pass as `before` for the next page; None on the last page
+
+class ResumeDiffResponse(BaseModel):
+    from_version: int
+    to_version: int
+    patch: List[Dict]
+
 class AnalyzeGapsRequest(BaseModel):
     user_id: Optional[str] = None
     job_description: str
     resume: Optional[Dict] = None
+    mode: Optional[GapMode] = None  # defaults to GAP_MODE
 
 class QuestionItem(BaseModel):
     question: str
@@ -954,6 +1869,23 @@ class QuestionItem(BaseModel):
 
 class AnalyzeGapsResponse(BaseModel):
     questions: List[QuestionItem]
+    source: Literal["llm", "local"] = "llm"
+
+class AnalyzeGapsBatchRequest(BaseModel):
+    user_id: Optional[str] = None
+    resume: Optional[Dict] = None
+    job_descriptions: List[str]
+    concurrency: Optional[int] = None  # defaults to GAP_BATCH_CONCURRENCY
+    mode: Optional[GapMode] = None  # defaults to GAP_MODE
+
+class GapBatchResult(BaseModel):
+    index: int
+    questions: List[QuestionItem] = []
+    source: Optional[Literal["llm", "local"]] = None
+    error: Optional[str] = None
+
+class AnalyzeGapsBatchResponse(BaseModel):
+    results: List[GapBatchResult]
 
 class AnswerRow(BaseModel):
     text: str
@@ -966,13 +1898,819 @@ class GenerateRequest(BaseModel):
     answers: Dict[int, List[AnswerRow]]
     resume: Optional[Dict] = None
     questions: Optional[List[QuestionItem]] = None
+    mode: Optional[ApplyMode] = None  # defaults to APPLY_MODE
 
 class GenerateResponse(BaseModel):
     resume: Dict
+    # Key of the model's operation list; GET /generate/replay/{ops_id} rebuilds without the model
+    # (None in local mode; 404 there if the model call failed and fallback routing was used instead)
+    ops_id: Optional[str] = None
+
+# ---------- Gap question cache ----------
+def _normalize_jd(job_description: str) -> str:
+    # Whitespace-only edits (pasted JD with different wrapping) shouldn't miss the cache
+    return re.sub(r"\s+", " ", job_description or "").strip()
+
+def gap_cache_key(resume_snippet: str, job_description: str, model: str, max_q: int) -> str:
+    h = hashlib.sha256()
+    for part in (resume_snippet, _normalize_jd(job_description), model, str(max_q)):
+        h.update(part.encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+class GapCache:
+    """
+    Two-tier cache of normalized gap questions keyed by gap_cache_key.
+    Memory tier is an LRU bounded by max_items; the SQLite tier (gap_cache table)
+    survives restarts and is shared by workers, bounded by sqlite_max rows.
+    Both tiers expire entries after ttl seconds.
+    """
+    def __init__(self, max_items: int, ttl: int, use_sqlite: bool, sqlite_max: int):
+        self.max_items = max_items
+        self.ttl = ttl
+        self.use_sqlite = use_sqlite
+        self.sqlite_max = sqlite_max
+        self._mem: "OrderedDict[str, Tuple[float, List[Dict]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.sqlite_hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[List[QuestionItem]]:
+        now = time.time()
+        with self._lock:
+            hit = self._mem.get(key)
+            if hit is not None:
+                if hit[0] > now:
+                    self._mem.move_to_end(key)
+                    self.memory_hits += 1
+                    return [QuestionItem(**d) for d in hit[1]]
+                del self._mem[key]
+
+        if self.use_sqlite:
+            with get_conn() as con:
+                row = con.execute(
+                    "SELECT payload, created_at FROM gap_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row and row[1] + self.ttl > now:
+                    con.execute("UPDATE gap_cache SET last_access = ? WHERE key = ?", (now, key))
+                    data = json_loads(row[0])
+                    self._remember(key, data, row[1] + self.ttl)
+                    with self._lock:
+                        self.sqlite_hits += 1
+                    return [QuestionItem(**d) for d in data]
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, items: List[QuestionItem]) -> None:
+        now = time.time()
+        data = [it.model_dump() for it in items]
+        self._remember(key, data, now + self.ttl)
+        if self.use_sqlite:
+            with get_conn() as con:
+                con.execute(
+                    "INSERT OR REPLACE INTO gap_cache (key, payload, created_at, last_access) VALUES (?, ?, ?, ?)",
+                    (key, json_dumps(data), now, now),
+                )
+                con.execute("DELETE FROM gap_cache WHERE created_at < ?", (now - self.ttl,))
+                con.execute(
+                    "DELETE FROM gap_cache WHERE key IN ("
+                    "  SELECT key FROM gap_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?"
+                    ")",
+                    (self.sqlite_max,),
+                )
+
+    def _remember(self, key: str, data: List[Dict], expires_at: float) -> None:
+        with self._lock:
+            self._mem[key] = (expires_at, data)
+            self._mem.move_to_end(key)
+            while len(self._mem) > self.max_items:
+                self._mem.popitem(last=False)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            hits = self.memory_hits + self.sqlite_hits
+            total = hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "sqlite_hits": self.sqlite_hits,
+                "misses": self.misses,
+                "hit_ratio": round(hits / total, 4) if total else 0.0,
+                "memory_entries": len(self._mem),
+                "memory_max": self.max_items,
+                "ttl_seconds": self.ttl,
+                "sqlite_enabled": self.use_sqlite,
+            }
+
+GAP_CACHE = GapCache(GAP_CACHE_SIZE, GAP_CACHE_TTL, GAP_CACHE_SQLITE, GAP_CACHE_SQLITE_MAX)
+
+# ---------- Single-flight ----------
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key: the first caller starts the work,
+    later callers with the same key wait for that result (or exception) instead of
+    repeating it. Nothing is remembered once the call finishes; caching stays with
+    GapCache / apply_ops.
+    """
+    def __init__(self, name: str):
+        self.name = name
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    async def run(self, key: str, fn):
+        task = self._tasks.get(key)
+        if task is None:
+            # A task of its own, so a leader that disconnects doesn't cancel it for the followers
+            task = asyncio.ensure_future(fn())
+            self._tasks[key] = task
+            task.add_done_callback(lambda t, key=key: self._finished(key, t))
+        else:
+            SINGLEFLIGHT_COALESCED.inc(flight=self.name)
+        return await asyncio.shield(task)
+
+    def _finished(self, key: str, task: asyncio.Task) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled():
+            task.exception()  # retrieved here in case every waiter went away
+
+    def in_flight(self) -> int:
+        return len(self._tasks)
+
+GAP_FLIGHTS = SingleFlight("gaps")
+APPLY_FLIGHTS = SingleFlight("apply")
+
+# ---------- Prompt projection ----------
+# Never useful to the model, always paid for in tokens
+_PROJECTION_DROP_BASICS = ("url", "image", "email", "phone", "profiles")
+_PROJECTION_DROP_SECTIONS = ("references", "meta")
+# (section, prunable list fields, prunable text fields); names/positions/dates always stay
+_PROJECTION_PRUNABLE = (
+    ("work", ("highlights",), ("summary", "description")),
+    ("projects", ("highlights",), ("description",)),
+    ("volunteer", ("highlights",), ("summary",)),
+    ("education", ("courses",), ()),
+)
+_PROJECTION_HEAD_FIELDS = ("name", "company", "position", "organization", "institution", "area", "studyType")
+_TERM_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or our that the their this to was we will with you your".split()
+)
+
+# Per-request accumulator for tokens saved; endpoints install a list, prompt builders append
+_PROMPT_SAVED: ContextVar[Optional[List[int]]] = ContextVar("prompt_tokens_saved", default=None)
+
+def approx_tokens(text: str) -> int:
+    """~4 characters per token: good enough for budgeting without a tokenizer dependency."""
+    return (len(text) + 3) // 4
+
+def _terms(text) -> set:
+    return {t for t in _TERM_RE.findall(str(text).lower()) if t not in _STOPWORDS}
+
+def _compact(obj) -> str:
+    return json_dumps(obj)
+
+def project_resume(resume: Dict, context: str, budget: int = PROMPT_RESUME_TOKENS) -> Tuple[Dict, int, int]:
+    """
+    Prompt-sized copy of `resume` for `context` (the JD, plus answers for /generate).
+
+    Contact details, URLs, references and meta are always dropped. If the rest is
+    still over `budget` tokens, highlights, summaries and courses are removed in
+    order of JD-term overlap (older entries first on ties) until it fits. Entry
+    names, positions, dates and skills are kept so anchors and "already present"
+    checks stay valid. Returns (projected, tokens_before, tokens_after).
+    """
+    before = approx_tokens(_compact(resume))
+    if budget <= 0:
+        return resume, before, before
+
+    out: Dict = {}
+    for key, val in resume.items():
+        if key in _PROJECTION_DROP_SECTIONS:
+            continue
+        if key == "basics" and isinstance(val, dict):
+            val = {k: v for k, v in val.items() if k not in _PROJECTION_DROP_BASICS}
+        elif isinstance(val, list):
+            val = [
+                {k: (list(v) if isinstance(v, list) else v) for k, v in e.items() if k != "url"} if isinstance(e, dict) else e
+                for e in val
+            ]
+        out[key] = val
+
+    text = _compact(out)
+    if approx_tokens(text) <= budget:
+        return out, before, approx_tokens(text)
+
+    wanted = _terms(context)
+    # (relevance, entry relevance, -position) sorts least useful first
+    candidates = []
+    for section, list_fields, text_fields in _PROJECTION_PRUNABLE:
+        entries = out.get(section)
+        if not isinstance(entries, list):
+            continue
+        for pos, e in enumerate(entries):
+            if not isinstance(e, dict):
+                continue
+            head = len(wanted & _terms(" ".join(str(e.get(k) or "") for k in _PROJECTION_HEAD_FIELDS)))
+            for field in list_fields:
+                items = e.get(field)
+                if isinstance(items, list):
+                    for i, item in enumerate(items):
+                        rank = (len(wanted & _terms(item)), head, -pos)
+                        candidates.append((rank, section, pos, field, i, len(_compact(item)) + 1))
+            for field in text_fields:
+                if e.get(field):
+                    rank = (len(wanted & _terms(e[field])), head, -pos)
+                    candidates.append((rank, section, pos, field, None, len(_compact({field: e[field]})) - 1))
+    candidates.sort(key=lambda c: c[0])
+
+    # Costs are in characters (item plus its separator), so the running size stays exact
+    drops: Dict[Tuple[str, int, str], set] = {}
+    size = len(text)
+    for _, section, pos, field, i, cost in candidates:
+        if (size + 3) // 4 <= budget:
+            break
+        drops.setdefault((section, pos, field), set()).add(i)
+        size -= cost
+    for (section, pos, field), idxs in drops.items():
+        entry = out[section][pos]
+        if None in idxs:
+            del entry[field]
+        else:
+            entry[field] = [x for i, x in enumerate(entry[field]) if i not in idxs]
+
+    return out, before, approx_tokens(_compact(out))
+
+def _prompt_resume(resume: Dict, context: str) -> Tuple[Dict, int]:
+    """project_resume for a prompt: returns (projected, tokens saved)."""
+    projected, before, after = project_resume(resume, context)
+    if DEBUG_GAPS:
+        print(f"[PROMPT] resume ~{before} -> ~{after} tokens")
+    return projected, before - after
+
+def _record_prompt_savings(saved: int) -> None:
+    """Called once a projected resume is actually sent to the model."""
+    PROMPT_TOKENS_SAVED.inc(saved)
+    acc = _PROMPT_SAVED.get()
+    if acc is not None:
+        acc.append(saved)
+
+def _track_prompt_savings() -> List[int]:
+    """Install a fresh accumulator for the current request; tasks spawned from it share the list."""
+    acc: List[int] = []
+    _PROMPT_SAVED.set(acc)
+    return acc
+
+# ---------- Skill lexicon ----------
+# Canonical skill/tool name -> aliases as they appear in JDs and résumés (matched case-insensitively).
+# Ambiguous short words ("go", "r", "c") are left out on purpose, and so are everyday words
+# ("rest", "react", "swift", "node", "security", "monitoring", ...): those tools only count in
+# their qualified forms, and canonical names (which match too) are chosen the same way.
+_BUILTIN_SKILL_TERMS: Dict[str, Tuple[str, ...]] = {
+    # Languages
+    "Python": ("python",), "Java": ("java",), "JavaScript": ("javascript", "js", "ecmascript"),
+    "TypeScript": ("typescript",), "C++": ("c++", "cpp"), "C#": ("c#", "csharp"), "Golang": ("golang",),
+    "Rust": ("rust",), "Ruby": ("ruby",), "PHP": ("php",), "Scala": ("scala",), "Kotlin": ("kotlin",),
+    "SwiftUI": ("swift ui",), "MATLAB": ("matlab",), "SAS": ("sas",), "Bash": ("bash", "shell scripting"),
+    "PowerShell": ("powershell",), "VBA": ("vba",), "SQL": ("sql",), "T-SQL": ("t-sql", "tsql"), "PL/SQL": ("pl/sql",),
+    # Data & storage
+    "PostgreSQL": ("postgresql", "postgres"), "MySQL": ("mysql",), "SQL Server": ("sql server", "mssql", "ssms"),
+    "Oracle": ("oracle",), "SQLite": ("sqlite",), "MongoDB": ("mongodb", "mongo"), "Redis": ("redis",),
+    "Cassandra": ("cassandra",), "DynamoDB": ("dynamodb",), "Elasticsearch": ("elasticsearch", "elastic search"),
+    "Snowflake": ("snowflake",), "BigQuery": ("bigquery",), "Redshift": ("redshift",), "Databricks": ("databricks",),
+    "Apache Spark": ("pyspark", "spark sql", "spark streaming"), "Hadoop": ("hadoop",), "Kafka": ("kafka",), "Airflow": ("airflow",),
+    "dbt": ("dbt",), "ETL": ("etl", "elt"), "Data Warehousing": ("data warehouse", "data warehousing"),
+    "Data Modeling": ("data modeling", "data modelling"), "Pandas": ("pandas",), "NumPy": ("numpy",),
+    "Microsoft Excel": ("ms excel", "advanced excel", "excel spreadsheets", "spreadsheets"), "Tableau": ("tableau",), "Power BI": ("power bi", "powerbi"), "Looker": ("looker",),
+    # ML / AI
+    "Machine Learning": ("machine learning", "ml"), "Deep Learning": ("deep learning",), "NLP": ("nlp", "natural language processing"),
+    "Computer Vision": ("computer vision",), "PyTorch": ("pytorch",), "TensorFlow": ("tensorflow",), "scikit-learn": ("scikit-learn", "sklearn"),
+    "LLMs": ("llm", "llms", "large language models"), "Statistics": ("statistics", "statistical analysis"),
+    "A/B Testing": ("a/b testing", "ab testing", "a/b tests"),
+    # Cloud & ops
+    "AWS": ("aws", "amazon web services"), "Azure": ("azure",), "GCP": ("gcp", "google cloud"), "S3": ("s3",),
+    "EC2": ("ec2",), "AWS Lambda": (), "Docker": ("docker", "containerization"), "Kubernetes": ("kubernetes", "k8s"),
+    "Terraform": ("terraform",), "Ansible": ("ansible",), "CI/CD": ("ci/cd", "continuous integration", "continuous delivery"),
+    "Jenkins": ("jenkins",), "GitHub Actions": ("github actions",), "Git": ("git",), "Linux": ("linux", "unix"),
+    "Observability": ("application monitoring", "infrastructure monitoring"), "Prometheus": ("prometheus",), "Grafana": ("grafana",),
+    "Microservices": ("microservices", "microservice"), "REST APIs": ("restful", "rest api", "rest apis"),
+    "GraphQL": ("graphql",), "gRPC": ("grpc",),
+    # Web & mobile
+    "React.js": ("reactjs",), "Angular": ("angular",), "Vue": ("vue", "vue.js"), "Node.js": ("nodejs",),
+    "Django": ("django",), "Flask": ("flask",), "FastAPI": ("fastapi",), "Spring Boot": ("spring framework", "spring mvc"),
+    ".NET": (".net", "asp.net"), "HTML": ("html", "html5"), "CSS": ("css", "css3"), "iOS": ("ios",), "Android": ("android",),
+    # Security & compliance
+    "Cybersecurity": ("information security", "application security", "infosec"), "IAM": ("iam", "identity and access management"), "SOC 2": ("soc 2", "soc2"),
+    "HIPAA": ("hipaa",), "GDPR": ("gdpr",), "GxP": ("gxp", "gmp", "glp"), "FDA": ("fda", "21 cfr part 11"), "ISO 27001": ("iso 27001",),
+    # Domain & lab
+    "LIMS": ("lims",), "ELN": ("eln", "electronic lab notebook"), "ERP": ("erp",), "SAP": ("sap",), "Salesforce": ("salesforce",),
+    "Jira": ("jira",), "Confluence": ("confluence",),
+    # Practices & soft skills commonly screened for
+    "Agile": ("agile", "scrum", "kanban"), "Project Management": ("project management",), "Stakeholder Management": ("stakeholder management",),
+    "Leadership": ("leadership", "led a team", "people management"), "Mentoring": ("mentoring", "mentorship"),
+    "Communication": ("communication skills",), "Technical Writing": ("technical writing", "technical documentation"),
+    "Testing": ("unit testing", "test automation", "automated testing", "qa"), "Debugging": ("debugging", "troubleshooting"),
+    "Performance Tuning": ("performance tuning", "query optimization", "indexing"), "Distributed Systems": ("distributed systems",),
+    "System Design": ("system design", "software architecture"),
+}
+
+# Past-tense verbs that open an accomplishment bullet
+_BUILTIN_ACTION_VERBS: Tuple[str, ...] = (
+    "achieved", "analyzed", "architected", "automated", "built", "championed", "coordinated", "created",
+    "cut", "debugged", "decreased", "delivered", "deployed", "designed", "developed", "drove", "engineered",
+    "established", "expanded", "grew", "headed", "implemented", "improved", "increased", "initiated",
+    "integrated", "introduced", "launched", "led", "maintained", "managed", "mentored", "migrated",
+    "modernized", "monitored", "optimized", "orchestrated", "owned", "partnered", "piloted", "prototyped",
+    "rebuilt", "redesigned", "reduced", "refactored", "resolved", "revamped", "saved", "scaled", "shipped",
+    "spearheaded", "standardized", "streamlined", "supervised", "trained", "transformed", "troubleshot",
+    "validated", "wrote",
+)
+# Nouns that make an answer read like evidence of work rather than a skill list
+_BUILTIN_SIGNAL_TERMS: Tuple[str, ...] = (
+    "accuracy", "api", "apis", "dashboard", "dashboards", "pipeline", "pipelines", "model", "models",
+    "latency", "throughput", "uptime", "revenue", "cost", "costs", "users", "customers", "clients",
+    "report", "reports", "server", "servers", "database", "databases", "workflow", "workflows",
+    "service", "services", "release", "releases", "migration", "incidents", "sla", "kpi", "kpis",
+)
+
+def _word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"  # what re's \w matches
+
+def _fold(text: str) -> str:
+    """text.lower() with offsets kept aligned (a few characters lower-case to two)."""
+    low = text.lower()
+    if len(low) != len(text):
+        low = "".join(c.lower() if len(c.lower()) == 1 else c for c in text)
+    return low
+
+def _ends_word(text: str, end: int) -> bool:
+    """No match may run on into a word character, "+", "#" or ".<word>"."""
+    if end >= len(text):
+        return True
+    q = text[end]
+    return not (_word_char(q) or q in "+#" or (q == "." and end + 1 < len(text) and _word_char(text[end + 1])))
+
+class SkillLexicon:
+    """
+    Every alias compiled once into an Aho-Corasick automaton over lower-cased characters,
+    so a scan is one pass over the text regardless of how many terms are loaded.
+
+    Matches are whole words only (an alias can't touch a letter, digit, "_", "+" or "#",
+    can't follow ".", "/" or "-", and can't be followed by ".<word>"), leftmost-longest and
+    non-overlapping: the same rules as the single-regex alternation this replaced.
+    """
+    def __init__(self, skills: Dict[str, Tuple[str, ...]], verbs: Tuple[str, ...] = (), signals: Tuple[str, ...] = ()):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[int, ...]] = [()]
+        self._entries: List[Tuple[int, str, str]] = []  # (alias length, canonical, kind)
+        seen = set()
+        tables = (("skill", skills), ("signal", {s: () for s in signals}), ("verb", {v: () for v in verbs}))
+        for kind, table in tables:
+            for name, aliases in table.items():
+                for alias in (name, *aliases):
+                    key = alias.strip().lower()
+                    if key and key not in seen:  # first definition of an alias wins
+                        seen.add(key)
+                        self._add(key, name, kind)
+        self._link()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _add(self, key: str, name: str, kind: str) -> None:
+        state = 0
+        for ch in key:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            state = nxt
+        self._out[state] = (len(self._entries),)
+        self._entries.append((len(key), name, kind))
+
+    def _link(self) -> None:
+        # Breadth-first, so a state's failure target is complete before the state itself
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+                queue.append(nxt)
+
+    def scan(self, text: str) -> List[Tuple[int, int, str, str]]:
+        """(start, end, canonical, kind) for every match in `text`, in order."""
+        if not text:
+            return []
+        low = _fold(text)
+        goto, fail, out, entries = self._goto, self._fail, self._out, self._entries
+        found = []
+        state = 0
+        for i, ch in enumerate(low):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for e in out[state]:
+                start, end = i + 1 - entries[e][0], i + 1
+                if start > 0:
+                    p = text[start - 1]
+                    if _word_char(p) or p in "+#./-":
+                        continue
+                if not _ends_word(text, end):
+                    continue
+                found.append((start, -end, e))
+        found.sort()
+        matches, pos = [], 0
+        for start, neg_end, e in found:
+            if start >= pos:
+                pos = -neg_end
+                matches.append((start, pos, entries[e][1], entries[e][2]))
+        return matches
+
+    def opens_with(self, text: str, kind: str = "verb") -> bool:
+        """
+        Whether `text` starts (after any punctuation) with an alias of `kind`. Unlike
+        scan(), a longer alias of another kind over the same words doesn't hide it:
+        "Led a team ..." opens with the verb "led" though scan() reports Leadership.
+        """
+        start = next((i for i, ch in enumerate(text) if _word_char(ch)), None)
+        if start is None or (start and text[start - 1] in "+#./-"):
+            return False
+        low = _fold(text)
+        state = 0
+        for i in range(start, len(text)):
+            state = self._goto[state].get(low[i])
+            if state is None:
+                return False
+            for e in self._out[state]:
+                length, _, k = self._entries[e]
+                if k == kind and length == i + 1 - start and _ends_word(text, i + 1):
+                    return True
+        return False
+
+    def terms(self, text: str, kind: str = "skill") -> Dict[str, int]:
+        """Canonical names of `kind` found in `text`, in first-seen order, with occurrence counts."""
+        found: Dict[str, int] = {}
+        for _, _, name, k in self.scan(text):
+            if k == kind:
+                found[name] = found.get(name, 0) + 1
+        return found
+
+def load_skill_lexicon(path: str = "") -> SkillLexicon:
+    """Built-in lexicon, with the JSON file at `path` (if any) merged over it."""
+    skills: Dict[str, Tuple[str, ...]] = {}
+    verbs: Tuple[str, ...] = ()
+    signals: Tuple[str, ...] = ()
+    if path:
+        with open(path, "rb") as fh:
+            data = json_loads(fh.read())
+        skills = {str(k): tuple(str(a) for a in (v or ())) for k, v in (data.get("skills") or {}).items()}
+        verbs = tuple(str(v) for v in data.get("verbs") or ())
+        signals = tuple(str(s) for s in data.get("signals") or ())
+    for name, aliases in _BUILTIN_SKILL_TERMS.items():
+        skills.setdefault(name, aliases)
+    return SkillLexicon(skills, verbs + _BUILTIN_ACTION_VERBS, signals + _BUILTIN_SIGNAL_TERMS)
+
+SKILL_LEXICON = load_skill_lexicon(SKILL_LEXICON_PATH)
+
+# ---------- Local gap analyzer ----------
+# A JD line with one of these marks its terms as must-haves
+_REQUIRED_LINE_RE = re.compile(r"\b(required|requirements|must|minimum|qualifications|you have|you will need)\b", re.I)
+
+def _local_terms(text: str) -> Dict[str, int]:
+    """Canonical skill terms found in `text`, in first-seen order, with occurrence counts."""
+    return SKILL_LEXICON.terms(text or "")
+
+def _resume_evidence(resume: Dict) -> Tuple[set, set]:
+    """(terms listed as skills, terms shown in work/project highlights or descriptions)."""
+    skills_text = []
+    for s in resume.get("skills") or []:
+        if isinstance(s, dict):
+            skills_text.append(str(s.get("name") or ""))
+            skills_text.extend(str(k) for k in (s.get("keywords") or []))
+        else:
+            skills_text.append(str(s))
+    used_text = []
+    for section in ("work", "projects"):
+        for e in resume.get(section) or []:
+            if not isinstance(e, dict):
+                continue
+            used_text.extend(str(h) for h in (e.get("highlights") or []))
+            used_text.extend(str(e.get(k) or "") for k in ("summary", "description"))
+            used_text.extend(str(k) for k in (e.get("keywords") or []))
+    return set(_local_terms("\n".join(skills_text))), set(_local_terms("\n".join(used_text)))
+
+def local_gap_questions(resume: Dict, job_description: str, max_q: int = 5) -> List[QuestionItem]:
+    """
+    Deterministic, network-free gap analysis: skill/tool terms from the JD that the
+    résumé never mentions ("missing") or only lists under skills without a work or
+    project highlight showing them in use ("weak"). Must-haves and repeated terms
+    come first, then JD order.
+    """
+    jd_terms = _local_terms(job_description)
+    if not jd_terms:
+        return []
+    required = set()
+    for line in (job_description or "").splitlines():
+        if _REQUIRED_LINE_RE.search(line):
+            required.update(_local_terms(line))
+    listed, used = _resume_evidence(resume)
+
+    gaps = []
+    for order, (term, count) in enumerate(jd_terms.items()):
+        if term in used:
+            continue
+        high = term in required or count > 1
+        gaps.append((0 if high else 1, 0 if term not in listed else 1, order, term, high))
+    gaps.sort()
+
+    items: List[QuestionItem] = []
+    for _, _, _, term, high in gaps[:max_q]:
+        if term in listed:
+            items.append(QuestionItem(
+                question=f"Where have you used {term} hands-on? Name the role or project, what you built with it, and one result.",
+                jd_gap=term,
+                gap_reason=f"{term} is listed under skills, but no work or project highlight shows it in use.",
+                coverage_status="weak",
+                answer_hint="Tool + what you built + scale or metric",
+                target_section="work",
+                skill_tags=[term],
+                evidence_type="outcome",
+                priority="high" if high else "medium",
+                response_tier="highlight",
+            ))
+        else:
+            items.append(QuestionItem(
+                question=f"Have you worked with {term}? If so, where, for what, and at what scale?",
+                jd_gap=term,
+                gap_reason=f"The job description asks for {term}; the résumé doesn't mention it.",
+                coverage_status="missing",
+                answer_hint="Yes/no, then tools, scope and where",
+                target_section="skills",
+                skill_tags=[term],
+                evidence_type="toolstack",
+                priority="high" if high else "medium",
+                response_tier="skill",
+            ))
+    return items
+
+# ---------- LLM calls ----------
+class CircuitOpenError(APIConnectionError):
+    """Raised instead of calling OpenAI while the breaker is open; callers treat it like an outage."""
+    def __init__(self):
+        super().__init__(message="OpenAI circuit breaker is open.",
+                         request=httpx.Request("POST", "https://api.openai.com/v1/chat/completions"))
+
+class CircuitBreaker:
+    """
+    closed -> open after `failures` failures inside `window` seconds; open -> half_open
+    after `cooldown` seconds, where a single probe call is let through; the probe's
+    outcome closes or re-opens it. Only outage-like errors count as failures
+    (connection/timeout, 429, 5xx); a 400 means the API is up.
+
+    allow() hands back a token to pass to record_success/record_failure/release;
+    only the probe's own token frees the probe slot.
+    """
+    def __init__(self, name: str, failures: int, window: float, cooldown: float):
+        self.name, self.failures, self.window, self.cooldown = name, failures, window, cooldown
+        self.state = "closed"
+        self.opened_at = 0.0
+        self.trips = 0
+        self.rejected = 0
+        self._recent: deque = deque()
+        self._probe: Optional[object] = None  # token of the half-open probe in flight
+        self._lock = threading.Lock()
+        METRICS.append(self)
+
+    def allow(self) -> Optional[object]:
+        """A token if the call may go ahead (falsy means fail fast)."""
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = "half_open"
+            if self.state == "closed":
+                return True
+            if self.state == "half_open" and self._probe is None:
+                self._probe = object()
+                return self._probe
+            self.rejected += 1
+            return None
+
+    def is_open(self) -> bool:
+        return self.state == "open" and time.monotonic() - self.opened_at < self.cooldown
+
+    def record_success(self, token: Optional[object] = None) -> None:
+        with self._lock:
+            if self.state == "half_open":
+                self.state = "closed"
+                self._recent.clear()
+            self._free_probe(token)
+
+    def record_failure(self, token: Optional[object] = None) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self._free_probe(token)
+            if self.state == "half_open":
+                self._open(now)
+                return
+            self._recent.append(now)
+            while self._recent and now - self._recent[0] > self.window:
+                self._recent.popleft()
+            if self.state == "closed" and len(self._recent) >= self.failures:
+                self._open(now)
+
+    def release(self, token: Optional[object] = None) -> None:
+        """The call was abandoned (cancelled) without an outcome."""
+        with self._lock:
+            self._free_probe(token)
+
+    def _free_probe(self, token: Optional[object]) -> None:
+        if token is not None and token is self._probe:
+            self._probe = None
+
+    def _open(self, now: float) -> None:
+        self.state = "open"
+        self.opened_at = now
+        self.trips += 1
+        self._recent.clear()
+        self._probe = None  # the next half-open period gets its own probe
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            state = self.state
+            if state == "open" and time.monotonic() - self.opened_at >= self.cooldown:
+                state = "half_open"  # next call will probe
+            return {
+                "name": self.name,
+                "state": state,
+                "recent_failures": len(self._recent),
+                "failure_threshold": self.failures,
+                "window_s": self.window,
+                "cooldown_s": self.cooldown,
+                "open_for_s": round(max(0.0, self.cooldown - (time.monotonic() - self.opened_at)), 3) if state == "open" else 0.0,
+                "trips": self.trips,
+                "rejected": self.rejected,
+            }
+
+    def render(self) -> List[str]:
+        snap = self.snapshot()
+        label = _fmt_labels(("breaker",), (self.name,))
+        lines = ["# HELP rivoney_breaker_state Circuit breaker state (1 for the current one).",
+                 "# TYPE rivoney_breaker_state gauge"]
+        for st in ("closed", "open", "half_open"):
+            lines.append(f"rivoney_breaker_state{_fmt_labels(('breaker', 'state'), (self.name, st))} {int(snap['state'] == st)}")
+        lines += ["# HELP rivoney_breaker_trips_total Times the breaker opened.", "# TYPE rivoney_breaker_trips_total counter",
+                  f"rivoney_breaker_trips_total{label} {snap['trips']}",
+                  "# HELP rivoney_breaker_rejected_total Calls failed fast while open.", "# TYPE rivoney_breaker_rejected_total counter",
+                  f"rivoney_breaker_rejected_total{label} {snap['rejected']}"]
+        return lines
+
+LLM_BREAKER = CircuitBreaker("openai", LLM_BREAKER_FAILURES, LLM_BREAKER_WINDOW_S, LLM_BREAKER_COOLDOWN_S)
+
+def _is_outage(e: BaseException) -> bool:
+    if isinstance(e, APIStatusError):
+        return e.status_code == 429 or e.status_code >= 500
+    return isinstance(e, (APIConnectionError, asyncio.TimeoutError))
+
+def _breaker_outcome(e: Optional[BaseException], token: Optional[object]) -> None:
+    if e is None or not _is_outage(e):
+        LLM_BREAKER.record_success(token)
+    else:
+        LLM_BREAKER.record_failure(token)
+
+def _count_usage(model: Optional[str], usage) -> None:
+    if usage is None:
+        return
+    LLM_TOKENS.inc(getattr(usage, "prompt_tokens", 0) or 0, model=model or "", kind="prompt")
+    LLM_TOKENS.inc(getattr(usage, "completion_tokens", 0) or 0, model=model or "", kind="completion")
+
+async def allm_create(*, max_retries: Optional[int] = None, **kwargs):
+    """
+    aclient.chat.completions.create behind LLM_BREAKER, timed as llm_call and with
+    resp.usage counted. `max_retries` overrides the client's SDK retries for this call.
+    """
+    token = LLM_BREAKER.allow()
+    if not token:
+        raise CircuitOpenError()
+    client = aclient if max_retries is None else aclient.with_options(max_retries=max_retries)
+    try:
+        with STAGE_SECONDS.time(stage="llm_call"):
+            resp = await client.chat.completions.create(**kwargs)
+    except asyncio.CancelledError:
+        LLM_BREAKER.release(token)  # hedge loser or deadline; _agap_call reports the deadline itself
+        raise
+    except Exception as e:
+        _breaker_outcome(e, token)
+        raise
+    _breaker_outcome(None, token)
+    _count_usage(kwargs.get("model"), getattr(resp, "usage", None))
+    return resp
+
+# ---------- LLM: Gap call strategy (deadline, schema memory, hedging) ----------
+class _SchemaSupport:
+    """Models that rejected response_format=json_schema recently; their schema attempt is skipped."""
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._rejected: Dict[str, float] = {}
+
+    def supported(self, model: str) -> bool:
+        t = self._rejected.get(model)
+        return t is None or time.monotonic() - t > self.ttl
+
+    def reject(self, model: str) -> None:
+        self._rejected[model] = time.monotonic()
+
+def _is_schema_rejection(e: APIStatusError) -> bool:
+    msg = str(e).lower()
+    return e.status_code == 400 and ("json_schema" in msg or "response_format" in msg)
+
+class _LatencyWindow:
+    """Recent successful call latencies, for the hedge threshold."""
+    def __init__(self, size: int = 256):
+        self._samples: deque = deque(maxlen=size)
+
+    def add(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, p: float, min_samples: int) -> Optional[float]:
+        if p <= 0 or len(self._samples) < min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100.0))]
+
+SCHEMA_SUPPORT = _SchemaSupport(SCHEMA_UNSUPPORTED_TTL)
+GAP_LATENCY = _LatencyWindow()
+
+def _deadline_error() -> APITimeoutError:
+    GAP_DEADLINES.inc()
+    return APITimeoutError(request=httpx.Request("POST", "https://api.openai.com/v1/chat/completions"))
+
+async def _within_deadline(call, deadline: float):
+    """
+    Await call(remaining) hard-capped at the request deadline. Outage-like failures
+    are retried (up to GAP_RETRIES, exponential backoff) only while the budget still
+    covers the wait, so no retry outlives the deadline.
+    """
+    for attempt in range(GAP_RETRIES + 1):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise _deadline_error()
+        try:
+            return await asyncio.wait_for(call(remaining), remaining)
+        except asyncio.TimeoutError:
+            LLM_BREAKER.record_failure()
+            raise _deadline_error() from None
+        except Exception as e:
+            backoff = 0.5 * 2 ** attempt
+            if (isinstance(e, CircuitOpenError) or not _is_outage(e) or attempt == GAP_RETRIES
+                    or deadline - time.monotonic() <= backoff):
+                raise
+            await asyncio.sleep(backoff)
+
+async def _agap_call(kwargs: Dict, deadline: float):
+    """One async gap call within the request deadline, hedged when GAP_HEDGE_PERCENTILE is set."""
+    return await _within_deadline(lambda remaining: _ahedged_create(kwargs, remaining), deadline)
+
+async def _ahedged_create(kwargs: Dict, remaining: float):
+    async def attempt():
+        t0 = time.perf_counter()
+        resp = await allm_create(**kwargs, timeout=remaining, max_retries=0)
+        GAP_LATENCY.add(time.perf_counter() - t0)
+        return resp
+
+    first = asyncio.ensure_future(attempt())
+    tasks = [first]
+    try:
+        hedge_after = GAP_LATENCY.percentile(GAP_HEDGE_PERCENTILE, GAP_HEDGE_MIN_SAMPLES)
+        if hedge_after is None or hedge_after >= remaining:
+            return await first
+        done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+        if done:
+            return first.result()
+        tasks.append(asyncio.ensure_future(attempt()))
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for t in done:
+                if not t.cancelled() and t.exception() is None:
+                    GAP_HEDGES.inc(winner="first" if t is first else "hedge")
+                    return t.result()
+        return first.result()  # both failed: surface the original error
+    finally:
+        for t in tasks:
+            if not t.done():
+                t.cancel()
 
 # ---------- LLM: Generate gap questions ----------
-def generate_gap_questions(resume: Dict, job_description: str, max_q: int = 5) -> List[QuestionItem]:
-    resume_snippet = json.dumps(resume, ensure_ascii=False, separators=(",", ":"))
+def _gap_prompt(resume_snippet: str, job_description: str, max_q: int) -> Tuple[str, str, Dict]:
+    """Build the (system, user, schema) triple shared by the gap paths (plain and streamed)."""
 
     system_msg = """
         You analyze a candidate’s JSON Resume and a job description to propose only meaningful, atomic follow-up questions
@@ -1043,216 +2781,394 @@ def generate_gap_questions(resume: Dict, job_description: str, max_q: int = 5) -
         },
         "required": ["questions"],
     }
+    return system_msg, user_msg, schema
+
+def _gap_request(system_msg: str, user_msg: str, schema: Dict, prefer_schema: bool) -> Dict:
+    """kwargs for chat.completions.create; json_schema when preferred, else lenient json_object."""
+    if prefer_schema:
+        response_format = {
+            "type": "json_schema",
+            "json_schema": {
+                "name": "GapQuestions",
+                "schema": schema,
+                "strict": True,
+            },
+        }
+    else:
+        response_format = {"type": "json_object"}
+    return {
+        "model": OPENAI_MODEL,
+        "response_format": response_format,
+        "messages": [
+            {"role": "system", "content": system_msg},
+            {"role": "user", "content": user_msg},
+        ],
+    }
 
-    def _call_openai(response_format):
-        return client.chat.completions.create(
-            model=OPENAI_MODEL,
-            response_format=response_format,
-            messages=[
-                {"role": "system", "content": system_msg},
-                {"role": "user", "content": user_msg},
-            ],
-        )
+# Normalizers
+def _norm_cov(v: Optional[str]) -> str:
+    s = (v or "").strip().lower()
+    if s in ("missing", "absent", "not_covered", "not covered", "none"):
+        return "missing"
+    if s.startswith("partial") or "weak" in s or s == "weak":
+        return "weak"
+    return "weak"
+
+def _norm_tier(v: Optional[str], text: str) -> Optional[str]:
+    s = (v or "").strip().lower()
+    if s in ("skill", "context", "highlight"):
+        return s
+    n = len(text or "")
+    if n < 80: return "skill"
+    if n < 160: return "context"
+    return "highlight"
+
+def _norm_anchor(a: Optional[str]) -> Optional[str]:
+    if not a:
+        return a
+    s = a.strip().replace("—", "-").replace("–", "-")
+    return s.split("-")[0].strip() if "-" in s else s
+
+def _clamp(s: Optional[str], n: int) -> Optional[str]:
+    return (s or "")[:n] if s else s
+
+# Cleaner synthesized questions, no "provide a bullet"
+def _synthesize_question(it: dict) -> str:
+    q = (it.get("question") or "").strip()
+    if q:
+        return q
+    jd = (it.get("jd_gap") or "").strip()
+    if jd:
+        return f"{jd} — include tools, scale, artifact, and one metric."
+    return "Add concise evidence: tools used, scope/scale, artifact, and one measurable outcome."
+
+def _normalize_gap_item(it: dict, full: bool = True) -> Optional[QuestionItem]:
+    """
+    Turn one raw model item into a QuestionItem, or None if it can't be salvaged.
+    The fallback pass (full=False) keeps only the core fields, as before.
+    """
+    qtext = _clamp(_synthesize_question(it), 220)
+    if not qtext:
+        return None
+    jd_gap = _clamp((it.get("jd_gap") or "").strip(), 220)
+    gap_reason = _clamp((it.get("gap_reason") or "").strip(), 220)
+    cov = _norm_cov(it.get("coverage_status"))
+    tier = _norm_tier(it.get("response_tier"), qtext or jd_gap)
+    section = it.get("target_section") if it.get("target_section") in ("work","projects","skills","education","certifications") else None
+    anchor = _norm_anchor(it.get("target_anchor"))
+
+    if not full:
+        try:
+            return QuestionItem(
+                question=qtext,
+                jd_gap=jd_gap,
+                gap_reason=gap_reason,
+                coverage_status=cov,
+                response_tier=tier,
+                target_section=section,
+                target_anchor=anchor,
+                answer_hint=_clamp(it.get("answer_hint"), 220),
+                skill_tags=it.get("skill_tags"),
+            )
+        except Exception:
+            return None
 
-    # Prefer schema; fallback to lenient json_object
-    def _fetch_raw_json(prefer_schema=True) -> str:
-        if prefer_schema:
-            try:
-                resp = _call_openai(
-                    {
-                        "type": "json_schema",
-                        "json_schema": {
-                            "name": "GapQuestions",
-                            "schema": schema,
-                            "strict": True,
-                        },
-                    }
-                )
-                return resp.choices[0].message.content or "{}"
-            except APIStatusError as e:
-                if e.status_code != 400:
-                    raise
-        resp2 = _call_openai({"type": "json_object"})
-        return resp2.choices[0].message.content or "{}"
+    payload = {
+        "question": qtext,
+        "jd_gap": jd_gap,
+        "gap_reason": gap_reason,
+        "coverage_status": cov,
+        "answer_hint": _clamp(it.get("answer_hint"), 220),
+        "bullet_skeleton": _clamp(it.get("bullet_skeleton"), 260),  # accepted but not used in UI
+        "example_bullet": _clamp(it.get("example_bullet"), 260),    # accepted but not used in UI
+        "target_section": section,
+        "target_anchor": anchor,
+        "suggested_fields": it.get("suggested_fields"),
+        "skill_tags": it.get("skill_tags"),
+        "evidence_type": it.get("evidence_type"),
+        "priority": it.get("priority") if it.get("priority") in ("high","medium") else "medium",
+        "response_tier": tier,
+    }
+    try:
+        return QuestionItem(**payload)
+    except ValidationError:
+        # fallback minimal
+        try:
+            return QuestionItem(
+                question=qtext,
+                jd_gap=jd_gap,
+                gap_reason=gap_reason,
+                coverage_status=cov
+            )
+        except Exception as ve:
+            if DEBUG_GAPS:
+                print("[GAPS] Dropped item after validation:", ve)
+            return None
 
-    content = _fetch_raw_json(prefer_schema=True)
+@timed("parse_normalize")
+def _collect_gap_items(content: str, items: List[QuestionItem], seen: set, attempt: int = 1) -> None:
+    """Parse one raw completion and append new, de-duplicated QuestionItems in place."""
     if DEBUG_GAPS:
-        print("\n--- [GAPS RAW CONTENT] ---")
+        suffix = "" if attempt == 1 else f" {attempt}"
+        print(f"\n--- [GAPS RAW CONTENT{suffix}] ---")
         print(content[:2000])
-        print("--- [END RAW CONTENT] ---\n")
-
-    # Normalizers
-    def norm_cov(v: Optional[str]) -> str:
-        s = (v or "").strip().lower()
-        if s in ("missing", "absent", "not_covered", "not covered", "none"):
-            return "missing"
-        if s.startswith("partial") or "weak" in s or s == "weak":
-            return "weak"
-        return "weak"
-
-    def norm_tier(v: Optional[str], text: str) -> Optional[str]:
-        s = (v or "").strip().lower()
-        if s in ("skill", "context", "highlight"):
-            return s
-        n = len(text or "")
-        if n < 80: return "skill"
-        if n < 160: return "context"
-        return "highlight"
-
-    def norm_anchor(a: Optional[str]) -> Optional[str]:
-        if not a:
-            return a
-        s = a.strip().replace("—", "-").replace("–", "-")
-        return s.split("-")[0].strip() if "-" in s else s
-
-    def clamp(s: Optional[str], n: int) -> Optional[str]:
-        return (s or "")[:n] if s else s
-
-    # Cleaner synthesized questions, no "provide a bullet"
-    def synthesize_question(it: dict) -> str:
-        q = (it.get("question") or "").strip()
-        if q:
-            return q
-        jd = (it.get("jd_gap") or "").strip()
-        if jd:
-            return f"{jd} — include tools, scale, artifact, and one metric."
-        return "Add concise evidence: tools used, scope/scale, artifact, and one measurable outcome."
-
-    # Parse + normalize
+        print(f"--- [END RAW CONTENT{suffix}] ---\n")
     try:
-        data = json.loads(content)
+        data = json_loads(content)
     except Exception as e:
         if DEBUG_GAPS:
-            print("[GAPS PARSE ERROR 1]", repr(e))
+            print(f"[GAPS PARSE ERROR {attempt}]", repr(e))
         data = {}
 
     raw_items = data.get("questions", []) if isinstance(data, dict) else []
-    if DEBUG_GAPS:
+    if DEBUG_GAPS and attempt == 1:
         print(f"[GAPS] raw_items count: {len(raw_items)}")
 
-    items: List[QuestionItem] = []
-    seen = set()
-
     for it in (raw_items or []):
         if not isinstance(it, dict):
             continue
-        qtext = clamp(synthesize_question(it), 220)
-        jd_gap = clamp((it.get("jd_gap") or "").strip(), 220)
-        gap_reason = clamp((it.get("gap_reason") or "").strip(), 220)
-        cov = norm_cov(it.get("coverage_status"))
-        tier = norm_tier(it.get("response_tier"), qtext or jd_gap)
-
-        section = it.get("target_section") if it.get("target_section") in ("work","projects","skills","education","certifications") else None
-        anchor = norm_anchor(it.get("target_anchor"))
-
-        payload = {
-            "question": qtext,
-            "jd_gap": jd_gap,
-            "gap_reason": gap_reason,
-            "coverage_status": cov,
-            "answer_hint": clamp(it.get("answer_hint"), 220),
-            "bullet_skeleton": clamp(it.get("bullet_skeleton"), 260),  # accepted but not used in UI
-            "example_bullet": clamp(it.get("example_bullet"), 260),    # accepted but not used in UI
-            "target_section": section,
-            "target_anchor": anchor,
-            "suggested_fields": it.get("suggested_fields"),
-            "skill_tags": it.get("skill_tags"),
-            "evidence_type": it.get("evidence_type"),
-            "priority": it.get("priority") if it.get("priority") in ("high","medium") else "medium",
-            "response_tier": tier,
-        }
+        qtext = _clamp(_synthesize_question(it), 220)
+        if not qtext or qtext in seen:
+            continue
+        item = _normalize_gap_item(it, full=(attempt == 1))
+        if item is not None:
+            items.append(item)
+            seen.add(qtext)
 
-        if qtext and qtext not in seen:
+def _debug_gap_items(items: List[QuestionItem]) -> None:
+    if DEBUG_GAPS:
+        print(f"[GAPS] normalized items count: {len(items)}")
+        for i, it in enumerate(items):
+            print(f"  - Q{i+1}: {it.question[:140]}")
+
+@timed("prompt_build")
+def _gap_prompt_key(resume: Dict, job_description: str, max_q: int) -> Tuple[str, str, int]:
+    """(projected resume snippet, gap cache key, prompt tokens saved) shared by every gap path."""
+    projected, saved = _prompt_resume(resume, job_description)
+    resume_snippet = _compact(projected)
+    return resume_snippet, gap_cache_key(resume_snippet, job_description, OPENAI_MODEL, max_q), saved
+
+async def acached_gap_questions(resume: Dict, job_description: str, max_q: int = 5) -> Optional[List[QuestionItem]]:
+    """Gap cache lookup only; never calls the model."""
+    return await run_in_threadpool(GAP_CACHE.get, _gap_prompt_key(resume, job_description, max_q)[1])
+
+async def agenerate_gap_questions(resume: Dict, job_description: str, max_q: int = 5) -> List[QuestionItem]:
+    """Up to max_q gap questions from the model (GapCache first; identical in-flight requests share one call)."""
+    resume_snippet, cache_key, saved = _gap_prompt_key(resume, job_description, max_q)
+    cached = await run_in_threadpool(GAP_CACHE.get, cache_key)
+    if cached is not None:
+        return cached
+    # An identical request already in flight is joined rather than repeated
+    return await GAP_FLIGHTS.run(
+        cache_key, lambda: _agenerate_gap_questions_uncached(resume_snippet, job_description, max_q, cache_key, saved))
+
+async def _agenerate_gap_questions_uncached(resume_snippet: str, job_description: str, max_q: int, cache_key: str, saved: int) -> List[QuestionItem]:
+    _record_prompt_savings(saved)
+    system_msg, user_msg, schema = _gap_prompt(resume_snippet, job_description, max_q)
+    # Everything below, retries included, finishes (or raises APITimeoutError) by this point
+    deadline = time.monotonic() + GAP_DEADLINE_S
+
+    async def _fetch_raw_json(prefer_schema=True) -> str:
+        if prefer_schema and not SCHEMA_SUPPORT.supported(OPENAI_MODEL):
+            GAP_SCHEMA_SKIPS.inc()
+        elif prefer_schema:
             try:
-                items.append(QuestionItem(**payload))
-                seen.add(qtext)
-            except ValidationError:
-                # fallback minimal
-                try:
-                    items.append(QuestionItem(
-                        question=qtext,
-                        jd_gap=jd_gap,
-                        gap_reason=gap_reason,
-                        coverage_status=cov
-                    ))
-                    seen.add(qtext)
-                except Exception as ve:
-                    if DEBUG_GAPS:
-                        print("[GAPS] Dropped item after validation:", ve)
+                resp = await _agap_call(_gap_request(system_msg, user_msg, schema, True), deadline)
+                return resp.choices[0].message.content or "{}"
+            except APIStatusError as e:
+                if e.status_code != 400:
+                    raise
+                if _is_schema_rejection(e):
+                    SCHEMA_SUPPORT.reject(OPENAI_MODEL)
+                GAP_SCHEMA_FALLBACKS.inc(path="async")
+        resp2 = await _agap_call(_gap_request(system_msg, user_msg, schema, False), deadline)
+        return resp2.choices[0].message.content or "{}"
 
-    if not items:
+    items: List[QuestionItem] = []
+    seen = set()
+    _collect_gap_items(await _fetch_raw_json(prefer_schema=True), items, seen, attempt=1)
+    if not items and deadline - time.monotonic() >= GAP_SECOND_PASS_MIN_S:
         if DEBUG_GAPS:
             print("[GAPS] Empty after first pass. Retrying with json_object fallback.")
-        content2 = _fetch_raw_json(prefer_schema=False)
-        if DEBUG_GAPS:
-            print("\n--- [GAPS RAW CONTENT 2] ---")
-            print(content2[:2000])
-            print("--- [END RAW CONTENT 2] ---\n")
+        GAP_SECOND_PASSES.inc(path="async")
+        _collect_gap_items(await _fetch_raw_json(prefer_schema=False), items, seen, attempt=2)
+
+    _debug_gap_items(items)
+    if items:
+        await run_in_threadpool(GAP_CACHE.put, cache_key, items[:max_q])
+    return items[:max_q]
+
+# ---------- LLM: Streamed gap questions ----------
+class _QuestionStreamParser:
+    """
+    Incremental scanner over a partial JSON document. Yields each complete object
+    inside the top-level "questions" array as soon as its closing brace arrives,
+    without waiting for (or re-parsing) the rest of the completion.
+    """
+    def __init__(self):
+        self.buf = ""
+        self.pos = 0
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.str_start = -1
+        self.last_key = None      # last string seen directly inside the root object
+        self.in_questions = False
+        self.obj_start = -1
+
+    def feed(self, chunk: str) -> Iterator[dict]:
+        self.buf += chunk
+        buf = self.buf
+        for i in range(self.pos, len(buf)):
+            ch = buf[i]
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+                    if self.depth == 1:
+                        self.last_key = buf[self.str_start + 1:i]
+                continue
+            if ch == '"':
+                self.in_string = True
+                self.str_start = i
+            elif ch in "{[":
+                self.depth += 1
+                if self.depth == 2 and ch == "[":
+                    self.in_questions = self.last_key == "questions"
+                elif self.depth == 3 and ch == "{" and self.in_questions:
+                    self.obj_start = i
+            elif ch in "}]":
+                if self.depth == 3 and ch == "}" and self.in_questions and self.obj_start >= 0:
+                    raw = buf[self.obj_start:i + 1]
+                    self.obj_start = -1
+                    try:
+                        obj = json_loads(raw)
+                    except Exception:
+                        obj = None
+                    if isinstance(obj, dict):
+                        yield obj
+                elif self.depth == 2 and ch == "]":
+                    self.in_questions = False
+                self.depth -= 1
+        self.pos = len(buf)
+
+async def astream_gap_questions(resume: Dict, job_description: str, max_q: int = 5) -> AsyncIterator[QuestionItem]:
+    """
+    Streaming variant of agenerate_gap_questions: yields each QuestionItem as soon
+    as it validates. Same cache, same json_schema -> json_object fallback, and the
+    same non-streamed second pass when the stream produced nothing usable.
+    """
+    resume_snippet, cache_key, saved = _gap_prompt_key(resume, job_description, max_q)
+    cached = await run_in_threadpool(GAP_CACHE.get, cache_key)
+    if cached is not None:
+        for it in cached:
+            yield it
+        return
+
+    _record_prompt_savings(saved)
+    system_msg, user_msg, schema = _gap_prompt(resume_snippet, job_description, max_q)
+    # Same budget as agenerate_gap_questions: opening, every chunk read and the second pass
+    deadline = time.monotonic() + GAP_DEADLINE_S
+    # llm_call covers the whole stream here; the final chunk carries usage
+    t0 = time.perf_counter()
+    prefer_schema = SCHEMA_SUPPORT.supported(OPENAI_MODEL)
+    if not prefer_schema:
+        GAP_SCHEMA_SKIPS.inc()
+
+    async def _open_stream(use_schema: bool, remaining: float):
+        # The breaker token stays with the stream: its outcome is known once the stream ends
+        token = LLM_BREAKER.allow()
+        if not token:
+            raise CircuitOpenError()
         try:
-            data2 = json.loads(content2)
+            s = await aclient.with_options(max_retries=0).chat.completions.create(
+                **_gap_request(system_msg, user_msg, schema, use_schema),
+                stream=True, stream_options={"include_usage": True}, timeout=remaining)
+        except asyncio.CancelledError:
+            LLM_BREAKER.release(token)
+            raise
         except Exception as e:
-            if DEBUG_GAPS:
-                print("[GAPS PARSE ERROR 2]", repr(e))
-            data2 = {}
-        # Re-run same normalization on fallback
-        for it in (data2.get("questions", []) if isinstance(data2, dict) else []):
-            if not isinstance(it, dict):
+            _breaker_outcome(e, token)
+            raise
+        return s, token
+
+    try:
+        stream, token = await _within_deadline(lambda remaining: _open_stream(prefer_schema, remaining), deadline)
+    except APIStatusError as e:
+        if e.status_code != 400 or not prefer_schema:
+            raise
+        if _is_schema_rejection(e):
+            SCHEMA_SUPPORT.reject(OPENAI_MODEL)
+        GAP_SCHEMA_FALLBACKS.inc(path="stream")
+        stream, token = await _within_deadline(lambda remaining: _open_stream(False, remaining), deadline)
+
+    async def _chunks():
+        chunks = stream.__aiter__()
+        while True:
+            try:
+                chunk = await asyncio.wait_for(chunks.__anext__(), max(0.0, deadline - time.monotonic()))
+            except StopAsyncIteration:
+                break
+            except asyncio.TimeoutError:
+                LLM_BREAKER.record_failure(token)
+                await stream.close()
+                raise _deadline_error() from None
+            except asyncio.CancelledError:
+                LLM_BREAKER.release(token)
+                raise
+            except Exception as e:
+                _breaker_outcome(e, token)
+                raise
+            try:
+                yield chunk
+            except GeneratorExit:  # the caller stopped reading (client went away)
+                LLM_BREAKER.release(token)
+                raise
+        _breaker_outcome(None, token)
+
+    items: List[QuestionItem] = []
+    seen = set()
+    parser = _QuestionStreamParser()
+    async with aclosing(_chunks()) as chunks:
+        async for chunk in chunks:
+            if not chunk.choices:
+                _count_usage(OPENAI_MODEL, getattr(chunk, "usage", None))
                 continue
-            qtext = clamp(synthesize_question(it), 220)
-            jd_gap = clamp((it.get("jd_gap") or "").strip(), 220)
-            gap_reason = clamp((it.get("gap_reason") or "").strip(), 220)
-            cov = norm_cov(it.get("coverage_status"))
-            tier = norm_tier(it.get("response_tier"), qtext or jd_gap)
-            section = it.get("target_section") if it.get("target_section") in ("work","projects","skills","education","certifications") else None
-            anchor = norm_anchor(it.get("target_anchor"))
-            if qtext and qtext not in seen:
-                try:
-                    items.append(QuestionItem(
-                        question=qtext,
-                        jd_gap=jd_gap,
-                        gap_reason=gap_reason,
-                        coverage_status=cov,
-                        response_tier=tier,
-                        target_section=section,
-                        target_anchor=anchor,
-                        answer_hint=clamp(it.get("answer_hint"), 220),
-                        skill_tags=it.get("skill_tags"),
-                    ))
+            delta = chunk.choices[0].delta.content or ""
+            for raw in parser.feed(delta):
+                qtext = _clamp(_synthesize_question(raw), 220)
+                if len(items) >= max_q or not qtext or qtext in seen:
+                    continue
+                item = _normalize_gap_item(raw)
+                if item is not None:
+                    items.append(item)
                     seen.add(qtext)
-                except Exception:
-                    pass
+                    yield item
+    STAGE_SECONDS.observe(time.perf_counter() - t0, stage="llm_call")
 
     if DEBUG_GAPS:
-        print(f"[GAPS] normalized items count: {len(items)}")
-        for i, it in enumerate(items):
-            print(f"  - Q{i+1}: {it.question[:140]}")
+        print("\n--- [GAPS STREAMED CONTENT] ---")
+        print(parser.buf[:2000])
+        print("--- [END STREAMED CONTENT] ---\n")
 
-    return items[:max_q]
+    if not items and deadline - time.monotonic() >= GAP_SECOND_PASS_MIN_S:
+        if DEBUG_GAPS:
+            print("[GAPS] Empty after streamed pass. Retrying with json_object fallback.")
+        GAP_SECOND_PASSES.inc(path="stream")
+        resp = await _agap_call(_gap_request(system_msg, user_msg, schema, False), deadline)
+        _collect_gap_items(resp.choices[0].message.content or "{}", items, seen, attempt=2)
+        for item in items[:max_q]:
+            yield item
 
-# ---------- LLM: Apply answers as operations ----------
-def apply_answers_with_llm(baseline: Dict, job_description: str, questions: List[QuestionItem], answers: Dict[int, List[AnswerRow]]) -> Dict:
-    """
-    Ask the model (GPT-5 Thinking) to return a list of operations that intelligently
-    add/merge bullets, add skills, and optionally update summary/education/certs.
-    Then deterministically apply those operations.
-    """
-    # Compact baseline and QA payload
-    baseline_snip = json.dumps(baseline, ensure_ascii=False, separators=(",", ":"))
-    qa = []
-    for idx, rows in (answers or {}).items():
-        q = questions[idx].question if (questions and idx < len(questions) and isinstance(questions[idx], QuestionItem)) else ""
-        qa.append({
-            "q_index": idx,
-            "question": q,
-            "rows": [{"text": r.text, "experience": r.experience or ""} for r in (rows or []) if (r.text or "").strip()]
-        })
-    payload = {
-        "job_description": job_description,
-        "baseline_resume": json.loads(baseline_snip),
-        "qa": qa
-    }
+    _debug_gap_items(items)
+    if items:
+        await run_in_threadpool(GAP_CACHE.put, cache_key, items[:max_q])
 
-    system_msg = """
+# ---------- LLM: Apply answers as operations ----------
+_APPLY_SYSTEM_MSG = """
 You are a resume editor. Given a baseline JSON Resume and Q&A answers, produce a compact set of OPERATIONS to improve the resume for this role while keeping it broadly reusable.
 
 Rules:
@@ -1277,122 +3193,173 @@ Constraints:
 - If unsure between highlight vs skills, choose skills.
 """.strip()
 
-    schema = {
-        "type": "object",
-        "additionalProperties": False,
-        "properties": {
-            "operations": {
-                "type": "array",
-                "items": {
-                    "type": "object",
-                    "additionalProperties": False,
-                    "oneOf": [
-                        {
-                            "type":"object",
-                            "properties":{
-                                "op":{"const":"add_highlight"},
-                                "section":{"type":"string","enum":["work","projects"]},
-                                "anchor":{"type":"string"},
-                                "text":{"type":"string","minLength":6,"maxLength":300}
-                            },
-                            "required":["op","section","anchor","text"]
+_APPLY_OPS_SCHEMA = {
+    "type": "object",
+    "additionalProperties": False,
+    "properties": {
+        "operations": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "additionalProperties": False,
+                "oneOf": [
+                    {
+                        "type":"object",
+                        "properties":{
+                            "op":{"const":"add_highlight"},
+                            "section":{"type":"string","enum":["work","projects"]},
+                            "anchor":{"type":"string"},
+                            "text":{"type":"string","minLength":6,"maxLength":300}
                         },
-                        {
-                            "type":"object",
-                            "properties":{
-                                "op":{"const":"rewrite_highlight"},
-                                "section":{"type":"string","enum":["work","projects"]},
-                                "anchor":{"type":"string"},
-                                "find":{"type":"string","minLength":3},
-                                "text":{"type":"string","minLength":6,"maxLength":300}
-                            },
-                            "required":["op","section","anchor","find","text"]
+                        "required":["op","section","anchor","text"]
+                    },
+                    {
+                        "type":"object",
+                        "properties":{
+                            "op":{"const":"rewrite_highlight"},
+                            "section":{"type":"string","enum":["work","projects"]},
+                            "anchor":{"type":"string"},
+                            "find":{"type":"string","minLength":3},
+                            "text":{"type":"string","minLength":6,"maxLength":300}
                         },
-                        {
-                            "type":"object",
-                            "properties":{
-                                "op":{"const":"add_skill_keywords"},
-                                "keywords":{"type":"array","items":{"type":"string"}}
-                            },
-                            "required":["op","keywords"]
+                        "required":["op","section","anchor","find","text"]
+                    },
+                    {
+                        "type":"object",
+                        "properties":{
+                            "op":{"const":"add_skill_keywords"},
+                            "keywords":{"type":"array","items":{"type":"string"}}
                         },
-                        {
-                            "type":"object",
-                            "properties":{
-                                "op":{"const":"add_education_highlight"},
-                                "anchor":{"type":"string"},
-                                "text":{"type":"string","minLength":6,"maxLength":300}
-                            },
-                            "required":["op","anchor","text"]
+                        "required":["op","keywords"]
+                    },
+                    {
+                        "type":"object",
+                        "properties":{
+                            "op":{"const":"add_education_highlight"},
+                            "anchor":{"type":"string"},
+                            "text":{"type":"string","minLength":6,"maxLength":300}
                         },
-                        {
-                            "type":"object",
-                            "properties":{
-                                "op":{"const":"add_certificate"},
-                                "name":{"type":"string","minLength":2},
-                                "summary":{"type":"string"}
-                            },
-                            "required":["op","name"]
+                        "required":["op","anchor","text"]
+                    },
+                    {
+                        "type":"object",
+                        "properties":{
+                            "op":{"const":"add_certificate"},
+                            "name":{"type":"string","minLength":2},
+                            "summary":{"type":"string"}
+                        },
+                        "required":["op","name"]
+                    },
+                    {
+                        "type":"object",
+                        "properties":{
+                            "op":{"const":"update_summary"},
+                            "mode":{"type":"string","enum":["append"]},
+                            "text":{"type":"string","minLength":6,"maxLength":140}
                         },
-                        {
-                            "type":"object",
-                            "properties":{
-                                "op":{"const":"update_summary"},
-                                "mode":{"type":"string","enum":["append"]},
-                                "text":{"type":"string","minLength":6,"maxLength":140}
-                            },
-                            "required":["op","mode","text"]
-                        }
-                    ]
-                }
+                        "required":["op","mode","text"]
+                    }
+                ]
             }
+        }
+    },
+    "required":["operations"]
+}
+
+def _qa_rows(questions: List[QuestionItem], answers: Dict[int, List[AnswerRow]]) -> List[Dict]:
+    qa = []
+    for idx, rows in (answers or {}).items():
+        q = questions[idx].question if (questions and idx < len(questions) and isinstance(questions[idx], QuestionItem)) else ""
+        qa.append({
+            "q_index": idx,
+            "question": q,
+            "rows": [{"text": r.text, "experience": r.experience or ""} for r in (rows or []) if (r.text or "").strip()]
+        })
+    return qa
+
+@timed("prompt_build")
+def _apply_payload(baseline: Dict, job_description: str, questions: List[QuestionItem], answers: Dict[int, List[AnswerRow]]) -> Tuple[List[Dict], Dict]:
+    """Projected baseline and QA payload; returns (qa, payload). Only built when the model will be called."""
+    qa = _qa_rows(questions, answers)
+    # Answers (and the experiences they name) count as relevance context alongside the JD
+    context = "\n".join([job_description] + [f"{r['experience']} {r['text']}" for item in qa for r in item["rows"]])
+    projected, saved = _prompt_resume(baseline, context)
+    _record_prompt_savings(saved)
+    payload = {
+        "job_description": job_description,
+        "baseline_resume": projected,
+        "qa": qa
+    }
+    return qa, payload
+
+def _apply_request(payload: Dict) -> Dict:
+    return {
+        "model": APPLY_MODEL,
+        "response_format": {
+            "type":"json_schema",
+            "json_schema":{"name":"ApplyOps","schema":_APPLY_OPS_SCHEMA,"strict":True}
         },
-        "required":["operations"]
+        "messages": [
+            {"role":"system","content":_APPLY_SYSTEM_MSG},
+            {"role":"user","content":json_dumps(payload)}
+        ],
     }
 
-    try:
-        resp = client.chat.completions.create(
-            model=APPLY_MODEL,
-            response_format={
-                "type":"json_schema",
-                "json_schema":{"name":"ApplyOps","schema":schema,"strict":True}
-            },
-            messages=[
-                {"role":"system","content":system_msg},
-                {"role":"user","content":json.dumps(payload, ensure_ascii=False)}
-            ]
-        )
-        content = resp.choices[0].message.content or "{}"
-        data = json.loads(content)
-        ops = data.get("operations", [])
-    except Exception:
-        # Fallback: simple routing (very conservative)
-        ops = []
-        for item in qa:
-            for row in item["rows"]:
-                txt = (row["text"] or "").strip()
-                if not txt:
-                    continue
-                # If it looks like a bullet (starts with verb, has tool/metric), add highlight; else skills
-                is_bullety = bool(re.match(r"^(Built|Led|Designed|Developed|Automated|Deployed|Implemented|Created|Optimized|Migrated|Analyzed|Engineered)\b", txt, re.I))
-                has_signal = bool(re.search(r"\b(\d+%|\d+/\d+|SQL|Python|AWS|S3|ETL|LIMS|pipeline|dashboard|indexing|PowerShell|SSMS|Server|Tableau|model|accuracy)\b", txt, re.I))
-                if is_bullety and has_signal and len(txt) >= 50:
-                    ops.append({"op":"add_highlight","section":"work","anchor":row.get("experience") or "", "text":txt[:220]})
-                else:
-                    # extract up to 3 words as keywords
-                    tokens = re.split(r"[,/;•]| and |\s{2,}", txt)
-                    kws = []
-                    for tok in tokens:
-                        t = tok.strip()
-                        if 2 <= len(t) <= 40 and re.search(r"[A-Za-z]", t):
-                            kws.append(t)
-                        if len(kws) >= 3:
-                            break
-                    if kws:
-                        ops.append({"op":"add_skill_keywords","keywords":kws})
-
-    # Deterministically apply ops to a working copy
+@timed("parse_normalize")
+def _ops_from_response(resp) -> List[Dict]:
+    content = resp.choices[0].message.content or "{}"
+    data = json_loads(content)
+    return data.get("operations", [])
+
+# Numbers that read as a result: 30%, 3/4, $2M, 10x, or any count of two or more digits
+_METRIC_RE = re.compile(r"\d+(?:\.\d+)?\s?%|\b\d+/\d+\b|[$€£]\s?\d|\b\d+(?:\.\d+)?x\b|\b\d{2,}", re.I)
+
+def local_apply_ops(qa: List[Dict]) -> List[Dict]:
+    """
+    Deterministic routing of answers to ops with SKILL_LEXICON, one scan per answer.
+    An answer that opens with an action verb, shows a skill, signal word or metric,
+    and is sentence-length becomes a highlight (its skills are added too); anything
+    else contributes the skills it names. Answers naming no known skill fall back to
+    up to three comma/slash-separated phrases.
+    """
+    ops = []
+    for item in qa:
+        for row in item["rows"]:
+            txt = (row["text"] or "").strip()
+            if not txt:
+                continue
+            hits = SKILL_LEXICON.scan(txt)
+            skills = list(dict.fromkeys(name for _, _, name, kind in hits if kind == "skill"))
+            verb_led = SKILL_LEXICON.opens_with(txt, "verb")
+            has_signal = bool(skills) or any(kind == "signal" for _, _, _, kind in hits) or bool(_METRIC_RE.search(txt))
+            if verb_led and has_signal and len(txt) >= 50:
+                ops.append({"op":"add_highlight","section":"work","anchor":row.get("experience") or "", "text":txt[:220]})
+                if skills:
+                    ops.append({"op":"add_skill_keywords","keywords":skills[:8]})
+            elif skills:
+                ops.append({"op":"add_skill_keywords","keywords":skills[:8]})
+            else:
+                # extract up to 3 words as keywords
+                tokens = re.split(r"[,/;•]| and |\s{2,}", txt)
+                kws = []
+                for tok in tokens:
+                    t = tok.strip()
+                    if 2 <= len(t) <= 40 and re.search(r"[A-Za-z]", t):
+                        kws.append(t)
+                    if len(kws) >= 3:
+                        break
+                if kws:
+                    ops.append({"op":"add_skill_keywords","keywords":kws})
+    return ops
+
+@timed("op_apply")
+def _apply_operations(baseline: Dict, ops: List[Dict]) -> Dict:
+    """Deterministically apply ops to a working copy of baseline."""
     tailored = copy.deepcopy(baseline)
+    # Built once per document and kept in sync as ops add entries/highlights
+    work_index = _FuzzyIndex()
+    work_seen: List = [None, -1]  # (pool list, len) the index was last built from
+    hl_indexes: Dict[int, _FuzzyIndex] = {}
 
     def _anchor_entry(section: str, anchor: str) -> Dict:
         anchor = (anchor or "").strip()
@@ -1401,13 +3368,16 @@ Constraints:
                 tailored["work"] = [{"name": anchor or "", "highlights": []}]
             # find closest by name/company
             pool = tailored["work"]
-            names = [(w.get("name") or w.get("company") or "") for w in pool]
-            if anchor and anchor in names:
-                return pool[names.index(anchor)]
-            if anchor and names:
-                close = get_close_matches(anchor, names, n=1, cutoff=0.6)
-                if close:
-                    return pool[names.index(close[0])]
+            if work_seen[0] is not pool or work_seen[1] != len(pool):
+                work_index.sync([(w.get("name") or w.get("company") or "") for w in pool])
+                work_seen[0], work_seen[1] = pool, len(pool)
+            if anchor:
+                idx = work_index.position(anchor)
+                if idx is not None:
+                    return pool[idx]
+                close = work_index.best(anchor, 0.6)
+                if close is not None:
+                    return pool[work_index.position(close)]
             # fallback: first
             return pool[0]
         else:
@@ -1440,7 +3410,8 @@ Constraints:
                 text = op["text"]
                 find = op.get("find") or ""
                 entry = _anchor_entry(section, anchor)
-                _rewrite_or_add_highlight(entry, text, find_match=find, cap=10 if section=="work" else 8)
+                index = hl_indexes.setdefault(id(entry), _FuzzyIndex())
+                _rewrite_or_add_highlight(entry, text, find_match=find, cap=10 if section=="work" else 8, index=index)
 
             elif op.get("op") == "add_skill_keywords":
                 kws = [k.strip() for k in (op.get("keywords") or []) if isinstance(k, str) and k.strip()]
@@ -1489,8 +3460,86 @@ Constraints:
 
     return tailored
 
+# ----- Stored operations (replay without the model) -----
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def apply_ops_id(user_id: str, baseline_version: int, job_description: str, questions: List[QuestionItem], answers: Dict[int, List[AnswerRow]]) -> Tuple[str, str, str]:
+    """Returns (ops_id, jd_hash, qa_hash) for one /generate input against one baseline version."""
+    jd_hash = _sha256(_normalize_jd(job_description))
+    # stdlib json on purpose: sort_keys output must stay byte-stable so existing ops_ids still resolve
+    qa_hash = _sha256(json.dumps(_qa_rows(questions, answers), ensure_ascii=False, sort_keys=True, separators=(",", ":")))
+    ops_id = _sha256("\x00".join([user_id, str(baseline_version), jd_hash, qa_hash, APPLY_MODEL]))
+    return ops_id, jd_hash, qa_hash
+
+def _apply_flight_key(baseline: Dict, job_description: str, questions: List[QuestionItem], answers: Dict[int, List[AnswerRow]]) -> str:
+    """Single-flight key without a stored-ops id: the baseline's own hash stands in for (user_id, version)."""
+    return apply_ops_id(_sha256(_compact(baseline)), -1, job_description, questions, answers)[0]
+
+def load_stored_ops(ops_id: str) -> Optional[Dict]:
+    with get_conn() as con:
+        row = con.execute(
+            "SELECT user_id, baseline_version, operations FROM apply_ops WHERE ops_id = ?",
+            (ops_id,),
+        ).fetchone()
+    if not row:
+        return None
+    return {"user_id": row[0], "baseline_version": row[1], "operations": json_loads(row[2])}
+
+def store_ops(ops_id: str, user_id: str, baseline_version: int, jd_hash: str, qa_hash: str, ops: List[Dict]) -> None:
+    with get_conn() as con:
+        con.execute(
+            "INSERT OR REPLACE INTO apply_ops (ops_id, user_id, baseline_version, jd_hash, qa_hash, model, operations, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (ops_id, user_id, baseline_version, jd_hash, qa_hash, APPLY_MODEL,
+             json_dumps(ops), datetime.utcnow().isoformat() + "Z"),
+        )
+
+async def aapply_answers_with_llm(baseline: Dict, job_description: str, questions: List[QuestionItem], answers: Dict[int, List[AnswerRow]],
+                                  user_id: Optional[str] = None, baseline_version: Optional[int] = None, mode: str = "llm") -> Dict:
+    """
+    Ask the model (GPT-5 Thinking) to return a list of operations that intelligently
+    add/merge bullets, add skills, and optionally update summary/education/certs.
+    Then deterministically apply those operations (pure CPU, stays synchronous).
+
+    With user_id + baseline_version, model ops are persisted in apply_ops and a
+    repeat of the same inputs replays them instead of calling the model.
+    mode="local" skips the model and routes answers with local_apply_ops.
+    """
+    if mode == "local":
+        return _apply_operations(baseline, local_apply_ops(_qa_rows(questions, answers)))
+    ref = None
+    if user_id is not None and baseline_version is not None:
+        ref = apply_ops_id(user_id, baseline_version, job_description, questions, answers)
+        stored = await run_in_threadpool(load_stored_ops, ref[0])
+        if stored is not None:
+            return _apply_operations(baseline, stored["operations"])
+
+    async def _model_ops() -> List[Dict]:
+        qa, payload = _apply_payload(baseline, job_description, questions, answers)
+        try:
+            resp = await allm_create(**_apply_request(payload))
+            ops = _ops_from_response(resp)
+        except Exception:
+            APPLY_FALLBACKS.inc()
+            return local_apply_ops(qa)
+        if ref:
+            await run_in_threadpool(store_ops, ref[0], user_id, baseline_version, ref[1], ref[2], ops)
+        return ops
+
+    key = ref[0] if ref else _apply_flight_key(baseline, job_description, questions, answers)
+    return _apply_operations(baseline, await APPLY_FLIGHTS.run(key, _model_ops))
+
 # ---------- FastAPI ----------
-app = FastAPI(title="Resume API (JSON Resume)")
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    if GENERATE_WORKERS > 0:
+        JOB_WORKERS.start(GENERATE_WORKERS)
+    yield
+    _SHUTTING_DOWN.set()
+    await JOB_WORKERS.stop(SHUTDOWN_GRACE_S)
+
+app = FastAPI(title="Resume API (JSON Resume)", lifespan=_lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -1501,6 +3550,7 @@ app.add_middleware(
     ],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Prompt-Tokens-Saved", "ETag"],
     allow_credentials=True,
     max_age=3600,
 )
@@ -1508,58 +3558,275 @@ app.add_middleware(
 # ---------- Endpoints ----------
 @app.post("/resume/save", response_model=SaveResumeResponse)
 def save_resume(req: SaveResumeRequest):
-    version = next_version_for(req.user_id)
     now = datetime.utcnow().isoformat() + "Z"
-    with get_conn() as con:
-        con.execute(
-            "INSERT INTO resumes (user_id, version, json_resume, created_at) VALUES (?, ?, ?, ?)",
-            (req.user_id, version, json.dumps(req.resume), now),
-        )
+    version = insert_resume_version(req.user_id, req.resume, now)
     return SaveResumeResponse(user_id=req.user_id, version=version, created_at=now)
 
+# Versions are immutable, so (user_id, version) identifies a body; browsers keep the copy and
+# revalidate on every use, which costs one index probe until the next save.
+_REVALIDATE = "private, no-cache"
+
+def _version_etag(kind: str, user_id: str, version: int) -> str:
+    return '"%s"' % hashlib.sha256(f"{kind}\x00{user_id}\x00{version}".encode("utf-8")).hexdigest()[:24]
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses weak comparison (RFC 9110 13.1.2), so W/"x" matches "x"."""
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+def _not_modified(endpoint: str, etag: str) -> Response:
+    NOT_MODIFIED.inc(endpoint=endpoint)
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": _REVALIDATE})
+
 @app.get("/resume/latest")
-def get_latest_resume(user_id: str = Query(...)):
-    return {"resume": load_latest_resume(user_id)}
+def get_latest_resume(user_id: str = Query(...), if_none_match: Optional[str] = Header(None)):
+    if if_none_match:
+        version = latest_resume_version(user_id)
+        etag = _version_etag("resume", user_id, version or 0)
+        if version is not None and _etag_matches(if_none_match, etag):
+            return _not_modified("resume_latest", etag)
+    # The stored/cached encoding goes out as-is: no parse, no jsonable_encoder walk, no re-encode
+    version, encoded = load_latest_resume_encoded(user_id)
+    return Response(b'{"resume":' + encoded + b"}", media_type="application/json",
+                    headers={"ETag": _version_etag("resume", user_id, version), "Cache-Control": _REVALIDATE})
+
+@app.get("/resume/versions", response_model=ResumeVersionsResponse)
+def resume_versions(user_id: str = Query(...), before: Optional[int] = Query(None, ge=1),
+                    limit: int = Query(50, ge=1, le=500)):
+    """Version metadata, newest first, keyset-paginated on version; no resume documents are read."""
+    rows = list_resume_versions(user_id, before, limit)
+    return ResumeVersionsResponse(
+        versions=[ResumeVersionMeta(version=v, created_at=c, encoding=e) for v, c, e in rows],
+        next_before=rows[-1][0] if len(rows) == limit and rows[-1][0] > 1 else None,
+    )
+
+@app.get("/resume/diff", response_model=ResumeDiffResponse)
+def resume_diff(user_id: str = Query(...), from_version: int = Query(..., alias="from", ge=1),
+                to_version: int = Query(..., alias="to", ge=1)):
+    """RFC 6902 patch that turns version `from` into version `to` (either direction)."""
+    return ResumeDiffResponse(from_version=from_version, to_version=to_version,
+                              patch=diff_resume_versions(user_id, from_version, to_version))
+
+@app.get("/template/options", response_class=FastJSONResponse)
+def template_options(response: Response, user_id: str = Query("demo"), if_none_match: Optional[str] = Header(None)):
+    """Distinct anchor names of the latest version, read from resume_anchors (saved alongside it)."""
+    # Version 0 in the ETag: no resume yet, the placeholder options
+    if if_none_match:
+        etag = _version_etag("options", user_id, latest_resume_version(user_id) or 0)
+        if _etag_matches(if_none_match, etag):
+            return _not_modified("template_options", etag)
+    version, anchors = load_latest_anchors(user_id)
+    etag = _version_etag("options", user_id, version or 0)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = _REVALIDATE
+    return {
+        "options": anchors["work"] or ["Experience 1"],
+        "projects": anchors["project"],
+        "institutions": anchors["institution"],
+        "certificates": anchors["certificate"],
+    }
 
-@app.get("/template/options")
-def template_options(user_id: str = Query("demo")):
+@app.get("/metrics")
+def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+_SHUTTING_DOWN = threading.Event()
+
+@app.get("/health/live", response_class=FastJSONResponse)
+def health_live():
+    """Liveness: the process is up and serving requests."""
+    return {"status": "ok"}
+
+@app.get("/health/ready", response_class=FastJSONResponse)
+def health_ready():
+    """Readiness: the database answers and the process isn't shutting down; 503 otherwise."""
+    if _SHUTTING_DOWN.is_set():
+        return FastJSONResponse({"status": "shutting_down"}, status_code=503)
     try:
-        resume = load_latest_resume(user_id)
-        names = []
-        for w in (resume.get("work") or []):
-            if isinstance(w, dict):
-                name = w.get("name") or w.get("company")
-                if name:
-                    names.append(name)
-        seen, opts = set(), []
-        for n in names:
-            if n not in seen:
-                seen.add(n)
-                opts.append(n)
-        return {"options": opts or ["Experience 1"]}
-    except HTTPException:
-        return {"options": ["Experience 1"]}
+        get_conn().execute("SELECT 1").fetchone()
+    except sqlite3.Error as e:
+        return FastJSONResponse({"status": "db_unavailable", "detail": str(e)}, status_code=503)
+    return {"status": "ok", "job_workers": len(JOB_WORKERS.tasks)}
+
+@app.get("/health/llm", response_class=FastJSONResponse)
+def llm_health():
+    """Breaker state for dashboards/alerts; "open" means LLM calls are being short-circuited to fallbacks."""
+    return LLM_BREAKER.snapshot()
+
+@app.get("/cache/gaps", response_class=FastJSONResponse)
+def gap_cache_stats():
+    return GAP_CACHE.stats()
+
+# Strong refs for fire-and-forget tasks (the event loop only keeps weak ones)
+_BACKGROUND_TASKS: set = set()
+
+def _spawn(coro) -> None:
+    task = asyncio.get_running_loop().create_task(coro)
+    _BACKGROUND_TASKS.add(task)
+    task.add_done_callback(_BACKGROUND_TASKS.discard)
+
+async def _warm_gap_cache(resume: Dict, job_description: str, max_q: int) -> None:
+    try:
+        await agenerate_gap_questions(resume=resume, job_description=job_description, max_q=max_q)
+    except Exception as e:
+        if DEBUG_GAPS:
+            print("[GAPS] background LLM pass failed:", repr(e))
+
+async def agap_questions_for_mode(resume: Dict, job_description: str, mode: str, max_q: int = 5) -> Tuple[List[QuestionItem], str]:
+    """
+    Returns (questions, source) for one JD. "local" never touches the network;
+    "local-then-llm" serves a cached LLM answer if there is one, otherwise the local
+    answer right away while the LLM pass fills the cache in the background; "llm"
+    falls back to the local analyzer when OpenAI can't answer (GAP_LOCAL_FALLBACK),
+    and always while LLM_BREAKER is open.
+    """
+    if mode == "local":
+        return local_gap_questions(resume, job_description, max_q), "local"
+    if mode == "local-then-llm":
+        cached = await acached_gap_questions(resume, job_description, max_q)
+        if cached is not None:
+            return cached, "llm"
+        if not LLM_BREAKER.is_open():
+            _spawn(_warm_gap_cache(resume, job_description, max_q))
+        return local_gap_questions(resume, job_description, max_q), "local"
+    try:
+        return await agenerate_gap_questions(resume=resume, job_description=job_description, max_q=max_q), "llm"
+    except CircuitOpenError:
+        return local_gap_questions(resume, job_description, max_q), "local"
+    except (APIConnectionError, RateLimitError, APIStatusError) as e:
+        if not GAP_LOCAL_FALLBACK:
+            raise
+        if DEBUG_GAPS:
+            print("[GAPS] LLM unavailable, answering locally:", repr(e))
+        return local_gap_questions(resume, job_description, max_q), "local"
 
 @app.post("/analyze/gaps", response_model=AnalyzeGapsResponse)
-def analyze_gaps(req: AnalyzeGapsRequest):
+async def analyze_gaps(req: AnalyzeGapsRequest, response: Response):
     if not req.user_id:
         req.user_id = "demo"
 
-    resume = req.resume or (load_latest_resume(req.user_id) if req.user_id else None)
+    resume = req.resume or ((await aload_latest_resume_view(req.user_id)) if req.user_id else None)
     if not resume:
         raise HTTPException(status_code=400, detail="Provide resume or user_id with a saved resume")
 
     print(f"[GAPS] received JD length={len(req.job_description)}")
-    qs = generate_gap_questions(resume=resume, job_description=req.job_description, max_q=5)
-    print(f"[GAPS] model returned raw -> {qs}")
-    return AnalyzeGapsResponse(questions=qs)
+    saved = _track_prompt_savings()
+    qs, source = await agap_questions_for_mode(resume, req.job_description, req.mode or GAP_MODE, max_q=5)
+    print(f"[GAPS] {source} returned raw -> {qs}")
+    response.headers["X-Prompt-Tokens-Saved"] = str(sum(saved))
+    return AnalyzeGapsResponse(questions=qs, source=source)
+
+@app.post("/analyze/gaps/batch", response_model=AnalyzeGapsBatchResponse)
+async def analyze_gaps_batch(req: AnalyzeGapsBatchRequest, response: Response):
+    """
+    One resume against many JDs. The resume is loaded once; each JD runs through
+    agenerate_gap_questions under a semaphore, and a failing JD only marks its own
+    result with an error.
+    """
+    if not req.user_id:
+        req.user_id = "demo"
+    if len(req.job_descriptions) > GAP_BATCH_MAX_JDS:
+        raise HTTPException(status_code=400, detail=f"At most {GAP_BATCH_MAX_JDS} job descriptions per batch")
+
+    resume = req.resume or ((await aload_latest_resume_view(req.user_id)) if req.user_id else None)
+    if not resume:
+        raise HTTPException(status_code=400, detail="Provide resume or user_id with a saved resume")
+
+    limit = max(1, min(req.concurrency or GAP_BATCH_CONCURRENCY, GAP_BATCH_MAX_CONCURRENCY))
+    sem = asyncio.Semaphore(limit)
+    mode = req.mode or GAP_MODE
+
+    async def one(idx: int, jd: str) -> GapBatchResult:
+        async with sem:
+            try:
+                qs, source = await agap_questions_for_mode(resume, jd, mode, max_q=5)
+                return GapBatchResult(index=idx, questions=qs, source=source)
+            except HTTPException as e:
+                return GapBatchResult(index=idx, error=str(e.detail))
+            except RateLimitError:
+                return GapBatchResult(index=idx, error="OpenAI rate limit. Please retry shortly.")
+            except APIConnectionError:
+                return GapBatchResult(index=idx, error="Could not reach OpenAI.")
+            except Exception as e:
+                if DEBUG_GAPS:
+                    print(f"[GAPS] batch item {idx} failed:", repr(e))
+                return GapBatchResult(index=idx, error="Unexpected error calling OpenAI.")
+
+    print(f"[GAPS] batch of {len(req.job_descriptions)} JDs, concurrency={limit}")
+    saved = _track_prompt_savings()
+    results = await asyncio.gather(*[one(i, jd) for i, jd in enumerate(req.job_descriptions)])
+    response.headers["X-Prompt-Tokens-Saved"] = str(sum(saved))
+    return AnalyzeGapsBatchResponse(results=list(results))
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json_dumps(data)}\n\n"
+
+@app.post("/analyze/gaps/stream")
+async def analyze_gaps_stream(req: AnalyzeGapsRequest):
+    """
+    Server-Sent Events flavour of /analyze/gaps. Emits one `question` event per
+    validated QuestionItem, then `done` (or `error` if the model call fails).
+    Headers go out before the prompt is built, so tokens saved ride on `done`.
+
+    Each event carries its `source`. In "local-then-llm" the local questions come
+    first and the LLM ones follow on the same stream; in "llm" a model failure
+    before anything was sent falls back to the local questions.
+    """
+    if not req.user_id:
+        req.user_id = "demo"
+
+    resume = req.resume or ((await aload_latest_resume_view(req.user_id)) if req.user_id else None)
+    if not resume:
+        raise HTTPException(status_code=400, detail="Provide resume or user_id with a saved resume")
+
+    mode = req.mode or GAP_MODE
+
+    async def events():
+        count = 0
+        saved = _track_prompt_savings()
+        if mode in ("local", "local-then-llm"):
+            for item in local_gap_questions(resume, req.job_description, max_q=5):
+                yield _sse("question", {"index": count, "source": "local", "question": item.model_dump()})
+                count += 1
+        if mode != "local":
+            try:
+                async for item in astream_gap_questions(resume=resume, job_description=req.job_description, max_q=5):
+                    yield _sse("question", {"index": count, "source": "llm", "question": item.model_dump()})
+                    count += 1
+            except Exception as e:
+                if DEBUG_GAPS:
+                    print("[GAPS] stream failed:", repr(e))
+                offline = isinstance(e, (APIConnectionError, RateLimitError, APIStatusError))
+                degraded = isinstance(e, CircuitOpenError) or (offline and GAP_LOCAL_FALLBACK)
+                if not (mode == "llm" and count == 0 and degraded):
+                    yield _sse("error", {"detail": "Unexpected error calling OpenAI."})
+                    return
+                for item in local_gap_questions(resume, req.job_description, max_q=5):
+                    yield _sse("question", {"index": count, "source": "local", "question": item.model_dump()})
+                    count += 1
+        yield _sse("done", {"count": count, "prompt_tokens_saved": sum(saved)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @app.post("/generate", response_model=GenerateResponse)
-def generate(req: GenerateRequest):
+async def generate(req: GenerateRequest, response: Response):
+    saved = _track_prompt_savings()
+    result = await run_generate(req)
+    response.headers["X-Prompt-Tokens-Saved"] = str(sum(saved))
+    return result
+
+async def run_generate(req: GenerateRequest) -> GenerateResponse:
+    """The whole /generate pipeline (load, apply, merge); shared by the endpoint and the job workers."""
     if not req.user_id:
         req.user_id = "demo"
 
-    baseline = load_latest_resume(req.user_id)
+    version, baseline = await aload_latest_resume_versioned(req.user_id)
 
     questions: List[QuestionItem] = []
     raw_qs = req.questions or []
@@ -1572,11 +3839,15 @@ def generate(req: GenerateRequest):
             except Exception:
                 continue
 
-    tailored = apply_answers_with_llm(
+    mode = req.mode or APPLY_MODE
+    tailored = await aapply_answers_with_llm(
         baseline=baseline,
         job_description=req.job_description,
         questions=questions,
-        answers=req.answers or {}
+        answers=req.answers or {},
+        user_id=req.user_id,
+        baseline_version=version,
+        mode=mode,
     )
 
     # Provenance
@@ -1585,4 +3856,327 @@ def generate(req: GenerateRequest):
     meta["source"] = "rivoney"
 
     merged = merge_resumes(baseline, tailored)
-    return GenerateResponse(resume=merged)
+    if mode == "local":
+        return GenerateResponse(resume=merged)  # nothing stored: local routing is free to recompute
+    ops_id = apply_ops_id(req.user_id, version, req.job_description, questions, req.answers or {})[0]
+    return GenerateResponse(resume=merged, ops_id=ops_id)
+
+@app.get("/generate/replay/{ops_id}", response_model=GenerateResponse)
+def replay_generate(ops_id: str):
+    """Rebuild a tailored resume from stored ops against the baseline version they were made for."""
+    stored = load_stored_ops(ops_id)
+    if stored is None:
+        raise HTTPException(status_code=404, detail="No stored operations for this id")
+    baseline = load_resume_version(stored["user_id"], stored["baseline_version"])
+    tailored = _apply_operations(baseline, stored["operations"])
+
+    meta = tailored.setdefault("meta", {})
+    meta["generatedAt"] = datetime.utcnow().isoformat() + "Z"
+    meta["source"] = "rivoney"
+
+    merged = merge_resumes(baseline, tailored)
+    return GenerateResponse(resume=merged, ops_id=ops_id)
+
+# ---------- Generate jobs (queue in SQLite, leased by worker tasks) ----------
+# A job is claimed by setting a lease; a worker that dies (or a process that restarts)
+# simply stops renewing it, and any worker picks the job up again once it lapses.
+# Leases are owned per worker task ("<WORKER_ID>/<n>"), so sibling tasks in a process can't
+# renew or finish each other's jobs.
+WORKER_ID = f"{os.uname().nodename if hasattr(os, 'uname') else 'host'}:{os.getpid()}:{os.urandom(4).hex()}"
+_JOB_TERMINAL = ("done", "failed")
+
+class GenerateJobCreated(BaseModel):
+    job_id: str
+    status: str
+
+class GenerateJobStatus(BaseModel):
+    job_id: str
+    status: Literal["queued", "running", "done", "failed"]
+    attempts: int
+    created_at: float
+    updated_at: float
+    result: Optional[GenerateResponse] = None
+    error: Optional[str] = None
+
+def enqueue_generate_job(req: GenerateRequest) -> str:
+    job_id = os.urandom(16).hex()
+    now = time.time()
+    with get_conn() as con:
+        con.execute(
+            "INSERT INTO generate_jobs(job_id, user_id, status, request, created_at, updated_at) VALUES (?,?,?,?,?,?)",
+            (job_id, req.user_id or "demo", "queued", req.model_dump_json(), now, now),
+        )
+    return job_id
+
+def claim_generate_job(owner: str) -> Optional[Tuple[str, str, int]]:
+    """
+    Lease the oldest runnable job (queued and past its run_after, or running with a
+    lapsed lease); returns (job_id, request, attempts).
+    """
+    now = time.time()
+    with get_conn() as con:
+        row = con.execute(
+            """
+            UPDATE generate_jobs
+               SET status = 'running', lease_owner = ?, lease_until = ?, attempts = attempts + 1, updated_at = ?
+             WHERE job_id = (
+                   SELECT job_id FROM generate_jobs
+                    WHERE (status = 'queued' AND run_after <= ?) OR (status = 'running' AND lease_until < ?)
+                    ORDER BY created_at LIMIT 1)
+            RETURNING job_id, request, attempts
+            """,
+            (owner, now + GENERATE_JOB_LEASE_S, now, now, now),
+        ).fetchone()
+    return tuple(row) if row else None
+
+def renew_generate_job(job_id: str, owner: str) -> bool:
+    """Extend `owner`'s lease; False once it has lost the job (lease lapsed and reclaimed, or finished)."""
+    now = time.time()
+    with get_conn() as con:
+        cur = con.execute(
+            "UPDATE generate_jobs SET lease_until = ?, updated_at = ? WHERE job_id = ? AND lease_owner = ? AND status = 'running'",
+            (now + GENERATE_JOB_LEASE_S, now, job_id, owner),
+        )
+    return cur.rowcount == 1
+
+def finish_generate_job(job_id: str, owner: str, status: str, result: Optional[str] = None, error: Optional[str] = None,
+                        run_after: float = 0.0) -> bool:
+    """Record an outcome (a requeue waits until `run_after`); a no-op (False) if `owner` no longer holds the lease."""
+    with get_conn() as con:
+        cur = con.execute(
+            """
+            UPDATE generate_jobs SET status = ?, result = ?, error = ?, run_after = ?, lease_owner = NULL, lease_until = NULL,
+                   updated_at = ?
+             WHERE job_id = ? AND lease_owner = ?
+            """,
+            (status, result, error, run_after, time.time(), job_id, owner),
+        )
+    return cur.rowcount == 1
+
+def release_generate_job(job_id: str, owner: str) -> bool:
+    """Hand a running job back to the queue uncounted (the attempt was interrupted, not failed)."""
+    with get_conn() as con:
+        cur = con.execute(
+            """
+            UPDATE generate_jobs SET status = 'queued', attempts = attempts - 1, lease_owner = NULL, lease_until = NULL,
+                   updated_at = ?
+             WHERE job_id = ? AND lease_owner = ?
+            """,
+            (time.time(), job_id, owner),
+        )
+    return cur.rowcount == 1
+
+def _job_error_retryable(e: Exception) -> bool:
+    """An invalid request or a 4xx (bar 429) fails the same way on every attempt."""
+    if isinstance(e, ValidationError):
+        return False
+    code = getattr(e, "status_code", None)
+    if isinstance(e, (HTTPException, APIStatusError)) and code is not None:
+        return code == 429 or code >= 500
+    return True
+
+def load_generate_job(job_id: str) -> Optional[GenerateJobStatus]:
+    row = get_conn().execute(
+        "SELECT job_id, status, attempts, created_at, updated_at, result, error FROM generate_jobs WHERE job_id = ?",
+        (job_id,),
+    ).fetchone()
+    if row is None:
+        return None
+    result = GenerateResponse.model_validate_json(row[5]) if row[5] else None
+    return GenerateJobStatus(job_id=row[0], status=row[1], attempts=row[2], created_at=row[3], updated_at=row[4],
+                             result=result, error=row[6])
+
+class _JobWorkers:
+    """GENERATE_WORKERS asyncio tasks draining generate_jobs; `changed` wakes workers and SSE subscribers."""
+    def __init__(self):
+        self.tasks: List[asyncio.Task] = []
+        self.changed: Optional[asyncio.Condition] = None
+        self.stopping = False
+
+    async def notify(self) -> None:
+        if self.changed is not None:
+            async with self.changed:
+                self.changed.notify_all()
+
+    async def wait(self, timeout: float) -> None:
+        if self.changed is None:
+            await asyncio.sleep(timeout)
+            return
+        async with self.changed:
+            try:
+                await asyncio.wait_for(self.changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self, n: int) -> None:
+        self.changed = asyncio.Condition()
+        self.stopping = False
+        self.tasks = [asyncio.get_running_loop().create_task(self._worker(i)) for i in range(n)]
+
+    async def stop(self, grace: float = 0.0) -> None:
+        """Stop claiming; running jobs get `grace` seconds to finish, then are cancelled (and requeued)."""
+        self.stopping = True
+        await self.notify()  # idle workers return right away
+        if self.tasks and grace > 0:
+            await asyncio.wait(self.tasks, timeout=grace)
+        for t in self.tasks:
+            t.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    async def _worker(self, n: int) -> None:
+        owner = f"{WORKER_ID}/{n}"
+        while not self.stopping:
+            try:
+                claimed = await run_in_threadpool(claim_generate_job, owner)
+            except Exception as e:
+                print(f"[JOBS] worker {n} claim failed:", repr(e))
+                claimed = None
+            if claimed is None:
+                await self.wait(GENERATE_JOB_POLL_S)
+                continue
+            await self._run(owner, *claimed)
+
+    async def _run(self, owner: str, job_id: str, request: str, attempts: int) -> None:
+        if attempts > GENERATE_JOB_MAX_ATTEMPTS:
+            # Only reachable through lapsed leases, i.e. workers keep dying on this job
+            await run_in_threadpool(finish_generate_job, job_id, owner, "failed", None, "Abandoned by workers too many times")
+            await self.notify()
+            return
+        await self.notify()  # queued -> running
+
+        async def attempt() -> GenerateResponse:
+            return await run_generate(GenerateRequest.model_validate_json(request))
+
+        loop = asyncio.get_running_loop()
+        work = loop.create_task(attempt())
+        heartbeat = loop.create_task(self._heartbeat(job_id, owner))
+        try:
+            await asyncio.wait((work, heartbeat), return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            # Shutting down: hand the job straight back instead of waiting for the lease to lapse
+            work.cancel()
+            await asyncio.gather(work, return_exceptions=True)
+            await run_in_threadpool(release_generate_job, job_id, owner)
+            raise
+        finally:
+            heartbeat.cancel()
+        if not work.done():
+            # The heartbeat lost the lease: another worker owns the job now, so stop and write nothing
+            work.cancel()
+            await asyncio.gather(work, return_exceptions=True)
+            print(f"[JOBS] {job_id} attempt {attempts} abandoned: lease lost")
+            return
+        try:
+            result = work.result()
+        except Exception as e:
+            retry = _job_error_retryable(e) and attempts < GENERATE_JOB_MAX_ATTEMPTS
+            print(f"[JOBS] {job_id} attempt {attempts} failed:", repr(e))
+            await run_in_threadpool(
+                finish_generate_job, job_id, owner, "queued" if retry else "failed", None, f"{type(e).__name__}: {e}",
+                time.time() + GENERATE_JOB_BACKOFF_S * 2 ** (attempts - 1) if retry else 0.0)
+        else:
+            await run_in_threadpool(finish_generate_job, job_id, owner, "done", result.model_dump_json())
+        await self.notify()
+
+    async def _heartbeat(self, job_id: str, owner: str) -> None:
+        """Renew the lease until cancelled; returns once it has been lost."""
+        while True:
+            await asyncio.sleep(GENERATE_JOB_LEASE_S / 3)
+            try:
+                if not await run_in_threadpool(renew_generate_job, job_id, owner):
+                    return
+            except sqlite3.Error as e:
+                print(f"[JOBS] {job_id} lease renewal failed:", repr(e))  # retried next beat
+
+JOB_WORKERS = _JobWorkers()  # started and stopped by _lifespan
+
+@app.post("/generate/jobs", response_model=GenerateJobCreated, status_code=202)
+async def create_generate_job(req: GenerateRequest):
+    """Queue a /generate run and return at once; poll GET /generate/jobs/{id} or subscribe to .../events."""
+    if not req.user_id:
+        req.user_id = "demo"
+    job_id = await run_in_threadpool(enqueue_generate_job, req)
+    await JOB_WORKERS.notify()
+    return GenerateJobCreated(job_id=job_id, status="queued")
+
+@app.get("/generate/jobs/{job_id}", response_model=GenerateJobStatus)
+async def get_generate_job(job_id: str):
+    job = await run_in_threadpool(load_generate_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="No such job")
+    return job
+
+@app.get("/generate/jobs/{job_id}/events")
+async def generate_job_events(job_id: str):
+    """
+    SSE: a `status` event on every state change, then `done` (with the GenerateResponse)
+    or `failed` (with the error) and the stream ends. Changes made by this process
+    arrive immediately; other processes' are picked up every GENERATE_JOB_POLL_S.
+    """
+    job = await run_in_threadpool(load_generate_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="No such job")
+
+    async def events():
+        last = None
+        current = job
+        while True:
+            if current.status != last:
+                last = current.status
+                yield _sse("status", {"job_id": job_id, "status": current.status, "attempts": current.attempts})
+            if current.status == "done":
+                yield _sse("done", {"job_id": job_id, "result": current.result.model_dump() if current.result else None})
+                return
+            if current.status == "failed":
+                yield _sse("failed", {"job_id": job_id, "error": current.error})
+                return
+            await JOB_WORKERS.wait(GENERATE_JOB_POLL_S)
+            current = await run_in_threadpool(load_generate_job, job_id)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# ---------- Frontend (pre-built, served by the backend in production) ----------
+# Served as the router's fallback rather than a catch-all route, so it only sees paths
+# no API route matched: unknown API calls stay 404 and wrong methods on API routes stay 405.
+class _HashedStaticFiles(StaticFiles):
+    """CRA's build/static files carry a content hash in their names, so they can be cached forever."""
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
+
+if FRONTEND_BUILD_DIR:
+    _FRONTEND_ROOT = os.path.realpath(FRONTEND_BUILD_DIR)
+    _FRONTEND_INDEX = os.path.join(_FRONTEND_ROOT, "index.html")
+    if not os.path.isfile(_FRONTEND_INDEX):
+        raise RuntimeError(f"FRONTEND_BUILD_DIR={FRONTEND_BUILD_DIR!r} has no index.html; run `npm run build` in frontend/")
+    if os.path.isdir(os.path.join(_FRONTEND_ROOT, "static")):
+        app.mount("/static", _HashedStaticFiles(directory=os.path.join(_FRONTEND_ROOT, "static")), name="static")
+
+    async def _frontend(scope, receive, send):
+        """
+        GET/HEAD of a top-level build file (favicon, manifest, ...) returns it as-is, and a
+        browser navigation (Accept: text/html) gets index.html for client-side routing;
+        everything else, fetch() calls to unknown API paths included, is the usual 404.
+        """
+        if scope["type"] == "http":
+            request = Request(scope)
+            path = request.url.path.lstrip("/")
+            candidate = os.path.realpath(os.path.join(_FRONTEND_ROOT, path))
+            response = None
+            if request.method in ("GET", "HEAD"):
+                if path and candidate.startswith(_FRONTEND_ROOT + os.sep) and os.path.isfile(candidate):
+                    response = FileResponse(candidate)
+                elif "text/html" in request.headers.get("accept", ""):
+                    response = FileResponse(_FRONTEND_INDEX, headers={"Cache-Control": "no-cache"})
+            if response is not None:
+                await response(scope, receive, send)
+                return
+        await app.router.not_found(scope, receive, send)
+
+    app.router.default = _frontend
@@ -1,36 +1,175 @@
 # File: rivoney.py
-import subprocess
+#
+#   python rivoney.py          dev: uvicorn --reload + the CRA dev server (ports 8000 / 3000)
+#   python rivoney.py --prod   one multi-worker server on port 8000 serving the API and frontend/build
+import argparse
+import importlib.util
 import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
 from pathlib import Path
 
 # Resolve absolute paths safely
 root_dir = Path(__file__).parent.resolve()
 backend_dir = root_dir / "backend"
 frontend_dir = root_dir / "frontend"
+build_dir = frontend_dir / "build"
+
+
+def run_dev():
+    # Ensure env var is set for the backend process
+    env = os.environ.copy()
+    env["DEBUG_GAPS"] = "1"
+
+    # Start FastAPI backend
+    backend_cmd = ["uvicorn", "main:app", "--reload", "--port", "8000"]
+    backend_proc = subprocess.Popen(backend_cmd, cwd=backend_dir, env=env)
+
+    # Start React frontend
+    frontend_proc = subprocess.Popen(
+        ["npm", "start"],
+        cwd=frontend_dir,
+        shell=True  # This is key for Windows shell commands like npm
+    )
+
+    print("Servers are running...")
+    print("FastAPI: http://localhost:8000")
+    print("Frontend: http://localhost:3000")
+
+    try:
+        backend_proc.wait()
+        frontend_proc.wait()
+    except KeyboardInterrupt:
+        print("Shutting down...")
+        backend_proc.terminate()
+        frontend_proc.terminate()
+
+
+def default_workers():
+    # Cores this process may actually run on (respects container/taskset limits where the OS reports them)
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+    return int(os.environ.get("WEB_CONCURRENCY", cores))
+
+
+def build_frontend(force):
+    if not force and (build_dir / "index.html").exists():
+        return
+    env = os.environ.copy()
+    env["REACT_APP_API_BASE"] = ""  # same origin: the backend serves the build
+    print("Building frontend...")
+    subprocess.run(["npm", "run", "build"], cwd=frontend_dir, env=env, shell=(os.name == "nt"), check=True)
+
+
+def server_cmd(args):
+    if args.server == "auto":
+        args.server = "gunicorn" if os.name != "nt" and importlib.util.find_spec("gunicorn") else "uvicorn"
+    # The server must outlast the app's own shutdown (SHUTDOWN_GRACE_S for running /generate jobs)
+    graceful = str(int(args.graceful_timeout))
+    if args.server == "gunicorn":
+        return [sys.executable, "-m", "gunicorn", "main:app",
+                "--worker-class", "uvicorn.workers.UvicornWorker",
+                "--workers", str(args.workers),
+                "--bind", f"{args.host}:{args.port}",
+                "--graceful-timeout", graceful,
+                "--keep-alive", "5"]
+    return [sys.executable, "-m", "uvicorn", "main:app",
+            "--host", args.host, "--port", str(args.port),
+            "--workers", str(args.workers),
+            "--timeout-graceful-shutdown", graceful,
+            "--proxy-headers"]
+
+
+def wait_ready(proc, url, timeout):
+    """Poll the readiness endpoint until it answers 200; False if the server exits or time runs out."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            return False
+        try:
+            with urllib.request.urlopen(url, timeout=2) as resp:
+                if resp.status == 200:
+                    return True
+        except OSError:
+            pass
+        time.sleep(0.5)
+    return False
+
+
+def run_prod(args):
+    if not args.no_frontend:
+        build_frontend(args.build)
+
+    env = os.environ.copy()
+    env.pop("DEBUG_GAPS", None)
+    if not args.no_frontend:
+        env["FRONTEND_BUILD_DIR"] = str(build_dir)
+    env.setdefault("SHUTDOWN_GRACE_S", str(max(0, args.graceful_timeout - 10)))
+
+    cmd = server_cmd(args)
+    print(f"Starting {args.server} with {args.workers} worker(s) on {args.host}:{args.port}")
+    # POSIX: own session, so the terminal's Ctrl-C reaches only us and we decide what the server gets.
+    # (Windows delivers Ctrl-C to every process on the console; the server handles it itself.)
+    proc = subprocess.Popen(cmd, cwd=backend_dir, env=env, start_new_session=(os.name != "nt"))
+
+    # SIGTERM is the graceful stop for both uvicorn and gunicorn (a second SIGINT makes uvicorn
+    # force-exit, and gunicorn treats SIGINT as a quick shutdown): send that first, and only
+    # escalate to SIGINT if asked to stop again
+    signals_seen = []
+
+    def forward(signum, frame):
+        signals_seen.append(signum)
+        if os.name == "nt" or proc.poll() is not None:
+            return
+        if len(signals_seen) == 1:
+            print("Draining in-flight requests (again to force)...")
+            proc.send_signal(signal.SIGTERM)
+        else:
+            proc.send_signal(signal.SIGINT)
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+
+    probe_host = "127.0.0.1" if args.host in ("0.0.0.0", "::") else args.host
+    if wait_ready(proc, f"http://{probe_host}:{args.port}/health/ready", args.startup_timeout):
+        print(f"Ready: http://localhost:{args.port}  (liveness /health/live, readiness /health/ready)")
+    elif proc.poll() is None:
+        print(f"Not ready after {args.startup_timeout:.0f}s; check the server log above")
+
+    # Ctrl-C lands here too (signal handler); keep waiting so the server can finish draining
+    while True:
+        try:
+            sys.exit(proc.wait())
+        except KeyboardInterrupt:
+            continue
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Run Rivoney (dev servers by default).")
+    ap.add_argument("--prod", action="store_true",
+                    help="multi-worker server without reload, serving the pre-built frontend")
+    ap.add_argument("--host", default="0.0.0.0", help="--prod bind address")
+    ap.add_argument("--port", type=int, default=8000, help="--prod port")
+    ap.add_argument("--workers", type=int, default=default_workers(),
+                    help="--prod worker processes (default: WEB_CONCURRENCY or usable cores)")
+    ap.add_argument("--server", choices=["auto", "uvicorn", "gunicorn"], default="auto",
+                    help="--prod process manager; auto picks gunicorn when installed (not on Windows)")
+    ap.add_argument("--graceful-timeout", type=float, default=30,
+                    help="--prod seconds a worker gets to drain on shutdown")
+    ap.add_argument("--startup-timeout", type=float, default=60, help="--prod seconds to wait for readiness")
+    ap.add_argument("--build", action="store_true", help="--prod: rebuild frontend/build even if it exists")
+    ap.add_argument("--no-frontend", action="store_true", help="--prod: API only, don't build or serve the frontend")
+    args = ap.parse_args()
+
+    if args.prod:
+        run_prod(args)
+    else:
+        run_dev()
+
 
-# Ensure env var is set for the backend process
-env = os.environ.copy()
-env["DEBUG_GAPS"] = "1"
-
-# Start FastAPI backend
-backend_cmd = ["uvicorn", "main:app", "--reload", "--port", "8000"]
-backend_proc = subprocess.Popen(backend_cmd, cwd=backend_dir, env=env)
-
-# Start React frontend
-frontend_proc = subprocess.Popen(
-    ["npm", "start"],
-    cwd=frontend_dir,
-    shell=True  # This is key for Windows shell commands like npm
-)
-
-print("Servers are running...")
-print("FastAPI: http://localhost:8000")
-print("Frontend: http://localhost:3000")
-
-try:
-    backend_proc.wait()
-    frontend_proc.wait()
-except KeyboardInterrupt:
-    print("Shutting down...")
-    backend_proc.terminate()
-    frontend_proc.terminate()
\ No newline at end of file
+if __name__ == "__main__":
+    main()